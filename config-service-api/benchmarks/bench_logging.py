@@ -0,0 +1,88 @@
+"""
+Compares search request latency with logging off, with a synchronous sink and
+with the queued, sampled sink configured by `settings.configure_logging`.
+
+Run from the repository root:
+    PYTHONPATH=config-service-api/src SVC_PORT=8080 \
+        python config-service-api/benchmarks/bench_logging.py
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RECORDS = 2000
+REQUESTS = 2000
+
+with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as _db:
+    json.dump(
+        [
+            {"name": f"config-{i}", "metadata": {"env": f"env-{i % 10}", "id": i}}
+            for i in range(RECORDS)
+        ],
+        _db,
+    )
+os.environ["DATABASE_PATH"] = _db.name
+
+from fastapi.testclient import TestClient  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from main import config_service  # noqa: E402
+from settings import SampledFilter, settings  # noqa: E402
+
+
+def run(client: TestClient) -> list[float]:
+    latencies = []
+    for i in range(REQUESTS):
+        # a distinct query per request so every call misses the search cache
+        started = time.perf_counter()
+        client.get(f"{settings.prefix}/search/?query=metadata.id={i}")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> None:
+    latencies.sort()
+    print(
+        f"{label:<22} mean={statistics.mean(latencies) * 1e3:7.3f}ms "
+        f"p50={latencies[len(latencies) // 2] * 1e3:7.3f}ms "
+        f"p99={latencies[int(len(latencies) * 0.99)] * 1e3:7.3f}ms"
+    )
+
+
+def main() -> None:
+    with open(os.devnull, "w", encoding="utf-8") as devnull, TestClient(
+        config_service
+    ) as client:
+        run(client)  # warm up
+
+        logger.remove()
+        report("logging off", run(client))
+
+        logger.remove()
+        logger.add(devnull, level="DEBUG")
+        report("synchronous sink", run(client))
+
+        logger.remove()
+        logger.add(devnull, level="DEBUG", serialize=True)
+        report("synchronous json", run(client))
+
+        # the sink configure_logging installs, pointed at devnull
+        logger.remove()
+        logger.add(
+            devnull,
+            level="DEBUG",
+            serialize=True,
+            enqueue=True,
+            filter=SampledFilter(settings.log_sample_interval),
+        )
+        report("queued, sampled json", run(client))
+        logger.complete()
+
+    os.remove(_db.name)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
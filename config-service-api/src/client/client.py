@@ -0,0 +1,199 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+import httpx
+from loguru import logger
+
+
+@dataclass
+class ConfigServiceClient:
+    """
+    Client for the config service.
+
+    Reads are served from an in-process copy of all configurations. The copy is
+    refreshed with conditional requests (`If-None-Match`), either by a background
+    thread every `refresh_interval` seconds or synchronously when it is older
+    than `max_staleness` seconds. Writes go straight to the service and mark
+    the local copy stale.
+
+    Use like this:
+        with ConfigServiceClient("http://config-service:8080") as client:
+            client.get("my-config")
+    """
+
+    base_url: str = "http://localhost:8080"
+    max_staleness: float = 30.0
+    refresh_interval: float | None = 10.0
+    timeout: float = 5.0
+    max_connections: int = 10
+    prefix: str = "/api/v1"
+    http_client: httpx.Client | None = None
+    _configs: Dict[str, dict] = field(default_factory=dict, init=False, repr=False)
+    _etag: str | None = field(default=None, init=False, repr=False)
+    _fetched_at: float | None = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+    _stop: threading.Event = field(
+        default_factory=threading.Event, init=False, repr=False
+    )
+    _thread: threading.Thread | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.http_client is None:
+            # a single pooled client so connections are reused across calls
+            self.http_client = httpx.Client(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+
+    def __enter__(self) -> "ConfigServiceClient":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """
+        Loads the configurations and starts the background refresh thread.
+        """
+        self.refresh()
+        if self.refresh_interval and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._refresh_loop, name="config-client-refresh", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stops the background refresh thread and closes the connection pool.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.http_client.close()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except httpx.HTTPError as e:
+                logger.warning(f"Background refresh of configs failed: {e}")
+
+    def refresh(self) -> bool:
+        """
+        Refreshes the local copy with a conditional request.
+        Returns True if the configurations changed.
+        """
+        headers = {"If-None-Match": self._etag} if self._etag else {}
+        response = self.http_client.get(f"{self.prefix}/configs", headers=headers)
+        if response.status_code == 304:
+            with self._lock:
+                self._fetched_at = time.monotonic()
+            return False
+        if response.status_code == 404:
+            configs = []
+        else:
+            response.raise_for_status()
+            configs = response.json()
+
+        by_name: Dict[str, dict] = {}
+        for config in configs:
+            # same rule as the service: the first config with a name wins
+            by_name.setdefault(config["name"], config)
+        with self._lock:
+            self._configs = by_name
+            self._etag = response.headers.get("ETag")
+            self._fetched_at = time.monotonic()
+        return True
+
+    def _ensure_fresh(self) -> None:
+        fetched_at = self._fetched_at
+        if fetched_at is None or time.monotonic() - fetched_at > self.max_staleness:
+            self.refresh()
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            self._fetched_at = None
+
+    def get(self, name: str) -> dict | None:
+        """
+        Returns the configuration with the given name, or None if it does not exist.
+        """
+        self._ensure_fresh()
+        return self._configs.get(name)
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, dict | None]:
+        """
+        Returns the configurations for all given names in one pass,
+        with None for names that do not exist.
+        """
+        self._ensure_fresh()
+        configs = self._configs
+        return {name: configs.get(name) for name in names}
+
+    def list(self) -> List[dict]:
+        """
+        Returns all configurations.
+        """
+        self._ensure_fresh()
+        return list(self._configs.values())
+
+    def search(self, query: str) -> List[dict]:
+        """
+        Searches the service for configurations matching `key1.key2...=value`.
+        """
+        response = self.http_client.get(
+            f"{self.prefix}/search/", params={"query": query}
+        )
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        return response.json()
+
+    def create(self, name: str, metadata: dict) -> None:
+        """
+        Creates a configuration.
+        """
+        response = self.http_client.post(
+            f"{self.prefix}/configs", json={"name": name, "metadata": metadata}
+        )
+        self._invalidate()
+        response.raise_for_status()
+
+    def update(self, name: str, metadata: dict, version: int | None = None) -> None:
+        """
+        Replaces the metadata of a configuration.
+        If `version` is given the update only succeeds if the config is still at
+        that version; otherwise the service answers 412, raised as HTTPStatusError.
+        """
+        response = self.http_client.put(
+            f"{self.prefix}/configs/{name}",
+            json={"name": name, "metadata": metadata},
+            headers=_if_match(version),
+        )
+        self._invalidate()
+        response.raise_for_status()
+
+    def delete(self, name: str, version: int | None = None) -> None:
+        """
+        Deletes a configuration, optionally only if it is still at `version`.
+        """
+        response = self.http_client.delete(
+            f"{self.prefix}/configs/{name}", headers=_if_match(version)
+        )
+        self._invalidate()
+        response.raise_for_status()
+
+
+def _if_match(version: int | None) -> dict:
+    return {} if version is None else {"If-Match": f'"{version}"'}
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+from prometheus_client import Counter
+
+from monitoring import NAMESPACE, SUBSYSTEM
+from settings import settings
+
+SHARED_CACHE = Counter(
+    "shared_cache_total",
+    "Number of lookups in the shared second-level cache.",
+    labelnames=("result",),
+    namespace=NAMESPACE,
+    subsystem=SUBSYSTEM,
+)
+
+
+class CacheBackend(ABC):
+    """
+    A second-level cache shared by the processes serving the same database.
+    Keys embed the database revision, so entries written by one process are
+    valid for every process holding the same data and become unreachable as
+    soon as the data changes; backends never need to be told about writes.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """
+        Returns the value stored under `key`, or None if there is none.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Stores `value` under `key`.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Drops every entry.
+        """
+
+
+@dataclass
+class DiskCache(CacheBackend):
+    """
+    Stores entries as files in a directory, which all workers on a host (or
+    pods sharing a volume) can read. Files are written atomically, and the
+    oldest are pruned once there are more than `max_entries`.
+    """
+
+    directory: str
+    max_entries: int = 10000
+    prune_every: int = 100
+    _writes: int = 0
+
+    def __post_init__(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.entry")
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            with open(self._path(key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(value)
+        os.replace(tmp_path, self._path(key))
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self) -> None:
+        """
+        Removes the least recently written entries above `max_entries`.
+        """
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".entry"):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        continue
+        entries.sort()
+        for _, path in entries[: max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # pruned concurrently by another process
+                pass
+
+    def clear(self) -> None:
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".entry"):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+
+@dataclass
+class RedisCache(CacheBackend):
+    """
+    Stores entries in Redis, or anything that speaks its API. `client` only
+    needs `get`, `set` (with an `ex` expiry), `scan_iter` and `delete`, e.g.
+    a `redis.Redis` instance. Entries expire after `ttl` seconds, which is
+    what eventually reclaims entries of old revisions.
+    """
+
+    client: Any
+    prefix: str = "config-service:"
+    ttl: int = 3600
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def get_cache_backend() -> CacheBackend | None:
+    """
+    Builds the backend selected by `settings.shared_cache`, or returns None if
+    the shared cache is disabled.
+    """
+    if settings.shared_cache == "disk":
+        return DiskCache(
+            settings.shared_cache_dir, max_entries=settings.shared_cache_max_entries
+        )
+    if settings.shared_cache == "redis":
+        try:
+            import redis  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            logger.error("SHARED_CACHE=redis needs the redis package, cache disabled")
+            return None
+        return RedisCache(
+            redis.Redis.from_url(settings.redis_url), ttl=settings.shared_cache_ttl
+        )
+    return None
@@ -1,10 +1,48 @@
 import json
-from typing import List
+import os
+import tempfile
+import threading
+from typing import Callable, Collection, Dict, List, Mapping, Sequence, TextIO
 import dataclasses
 from dataclasses import dataclass, field
 from models.config import Config
+from models.ingest import check_document
+from connector.cache import SHARED_CACHE, CacheBackend, get_cache_backend
+from connector.index import (
+    RECORDS_EXAMINED,
+    SEARCH_PLANS,
+    IndexMemoryCollector,
+    build_indexes,
+    choose_plan,
+    path_label,
+    update_indexes,
+)
+from connector.query import parse_query
+from connector.singleflight import SingleFlight
+from connector.snapshot import Snapshot, record_digest
+from connector.patch import Path, PatchError, json_patch, merge_patch
 from settings import settings
+from tracing import tracer
 from loguru import logger
+from prometheus_client import REGISTRY
+
+# hot-path records are rate-limited by settings.SampledFilter, with a sample
+# key per call site so that one message never hides another
+lookup_logger = logger.bind(sample="connector.shared_cache.get")
+update_logger = logger.bind(sample="connector.shared_cache.set")
+plan_logger = logger.bind(sample="connector.search.plan")
+results_logger = logger.bind(sample="connector.search.results")
+
+
+class VersionConflict(Exception):
+    """
+    Raised when a write is conditioned on a version that is no longer current.
+    """
+
+    def __init__(self, name: str, version: int) -> None:
+        super().__init__(f"Config {name} is at version {version}")
+        self.name = name
+        self.version = version
 
 
 class ConfigJSONEncoder(json.JSONEncoder):
@@ -23,22 +61,85 @@ class ConfigJSONEncoder(json.JSONEncoder):
 class Connector:
     """
     Represents a connector to the database, which stores and retrieves configurations.
+    The data lives in an immutable Snapshot. Reads use whichever snapshot is
+    current when they start and never lock; writes are serialized, build a
+    new snapshot, persist it and then publish it with a single reference swap.
     """
 
     file_path: str
-    database: List[Config] = field(default_factory=list)
     cacheValid: bool = True
+    cache_size: int = 1024
+    journal_limit: int = 1000
+    shared_cache: CacheBackend | None = None
+    index_specs: Mapping[str, str] = field(default_factory=dict)
+    config_max_bytes: int = 1024 * 1024
+    config_max_depth: int = 32
+    _snapshot: Snapshot = field(
+        default_factory=lambda: Snapshot.build(0, ()),
+        init=False,
+        repr=False,
+        compare=False,
+    )
+    _journal_entries: int = field(default=0, init=False, repr=False, compare=False)
+    _sequence: int = field(default=0, init=False, repr=False, compare=False)
+    _search_cache: Dict[str, List[dict]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _cache_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+    _flight: SingleFlight = field(
+        default_factory=SingleFlight, init=False, repr=False, compare=False
+    )
+    _write_lock: threading.RLock = field(
+        default_factory=threading.RLock, init=False, repr=False, compare=False
+    )
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """
+        The current immutable view of the database.
+        """
+        return self._snapshot
+
+    @property
+    def database(self) -> List[Config]:
+        """
+        A copy of the configurations in the current snapshot.
+        """
+        return list(self._snapshot.records)
+
+    @property
+    def journal_path(self) -> str:
+        """
+        The path of the append-only journal holding patches applied since the
+        last full save of the database.
+        """
+        return f"{self.file_path}.journal"
+
+    @property
+    def sequence_path(self) -> str:
+        """
+        The path of the file holding the last version handed out, which
+        outlives the configs that were deleted since.
+        """
+        return f"{self.file_path}.sequence"
 
     def load(self) -> None:
         """
-        Loads the database from the file specified in `file_path`.
+        Loads the database from the file specified in `file_path`,
+        then replays any patches recorded in the journal.
         Raises FileNotFoundError if the file is not found.
         Raises ValueError if the file has invalid JSON format.
         """
         try:
             with open(self.file_path, "r", encoding="utf-8") as file:
-                self.database = [
-                    Config(name=data["name"], metadata=data["metadata"])
+                records = [
+                    Config(
+                        name=data["name"],
+                        metadata=data["metadata"],
+                        version=data.get("version", 1),
+                    )
                     for data in json.load(file)
                 ]
         except FileNotFoundError:
@@ -49,126 +150,559 @@ class Connector:
             raise ValueError(
                 f"Invalid JSON format in database file '{self.file_path}'."
             ) from None
+        with self._write_lock:
+            self._replay_journal(records)
+            self._sequence = max(
+                [self._read_sequence()] + [config.version for config in records]
+            )
+            self._publish(records)
+
+    @tracer.traced("persist")
+    def save_database(self, records: Sequence[Config] | None = None) -> None:
+        """
+        Saves `records` (by default the current snapshot) to the file specified
+        in `file_path`. The journal is folded into the saved file and removed.
+        """
+        if records is None:
+            records = self._snapshot.records
+        # the sequence goes first, so it is never behind the saved versions
+        _write_atomically(
+            self.sequence_path, lambda file: file.write(str(self._sequence))
+        )
+        _write_atomically(
+            self.file_path,
+            lambda file: json.dump(
+                [dict(config) for config in records], file, cls=ConfigJSONEncoder
+            ),
+        )
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_entries = 0
+
+    @tracer.traced("persist")
+    def _append_journal(
+        self, name: str, delta: dict, records: Sequence[Config]
+    ) -> None:
+        """
+        Records a patch as a delta of changed paths instead of rewriting the
+        whole database. Compacts `records` into a full save once the journal
+        grows past `journal_limit` entries.
+        """
+        if self._journal_entries >= self.journal_limit:
+            self.save_database(records)
+            return
+        with open(self.journal_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"name": name, **delta}) + "\n")
+        self._journal_entries += 1
+
+    def _read_sequence(self) -> int:
+        try:
+            with open(self.sequence_path, "r", encoding="utf-8") as file:
+                return int(file.read())
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            logger.warning(f"Ignoring invalid sequence file {self.sequence_path}")
+            return 0
+
+    def _next_version(self) -> int:
+        """
+        Returns the version of the next write. Versions come from a single
+        sequence for the whole database, so a config deleted and created again
+        never gets a version, and so an ETag, it had before.
+        Must be called with the write lock held.
+        """
+        self._sequence += 1
+        return self._sequence
+
+    def _replay_journal(self, records: List[Config]) -> None:
+        self._journal_entries = 0
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # a torn write at the end of the journal
+                    logger.warning(
+                        f"Skipping invalid journal entry in {self.journal_path}"
+                    )
+                    continue
+                for i, config in enumerate(records):
+                    if config.name == entry["name"]:
+                        # the database file may already hold this change if
+                        # the process stopped between a full save and the
+                        # removal of the journal
+                        if _delta_version(entry) > config.version:
+                            records[i] = Config(**_apply_delta(dict(config), entry))
+                        break
+                self._journal_entries += 1
 
-    def save_database(self) -> None:
+    def _publish(
+        self,
+        records: Sequence[Config],
+        name: str | None = None,
+        changed: List[Path] | None = None,
+        position: int | None = None,
+    ) -> Snapshot:
         """
-        Saves the current database to the file specified in `file_path`.
+        Swaps in a new snapshot built from `records` and invalidates the search
+        cache: entirely, or only the entries affected by `changed` paths of
+        config `name` when they are given.
+        If only the record at `position` changed (or was appended), the
+        secondary indexes and the revision are updated for it instead of
+        being rebuilt.
+        Must be called with the write lock held.
         """
-        with open(self.file_path, "w", encoding="utf-8") as file:
-            json.dump(
-                [dict(config) for config in self.database], file, cls=ConfigJSONEncoder
+        previous = self._snapshot
+        if position is None:
+            indexes = build_indexes(self.index_specs, records)
+            digest = None
+        else:
+            old = (
+                previous.records[position] if position < len(previous.records) else None
             )
+            indexes = update_indexes(
+                previous.indexes, position, old, records[position], changed
+            )
+            digest = (
+                previous.digest
+                - record_digest(position, old)
+                + record_digest(position, records[position])
+            )
+        snapshot = Snapshot.build(previous.generation + 1, records, indexes, digest)
+        with self._cache_lock:
+            self._snapshot = snapshot
+            if changed is None:
+                self._search_cache.clear()
+            else:
+                self._invalidate(name, changed)
+        return snapshot
 
     def clear_cache(self) -> None:
         """
         Clears the cache.
+        Publishes a new generation so that in-flight searches started before
+        the call neither populate the cache nor get joined by new callers.
+        """
+        with self._write_lock:
+            self._publish(self._snapshot.records)
+
+    @property
+    def revision(self) -> str:
+        """
+        Returns a digest of the current database contents.
+        It only changes when the data changes and is identical across processes
+        holding the same data, which makes it usable as an ETag.
         """
-        self.search.cache_clear()
+        return self._snapshot.revision
 
-    @logger.catch
-    def list_configs(self) -> List[Config] | None:
+    @tracer.traced("connector.list_configs")
+    def list_configs(self, snapshot: Snapshot | None = None) -> List[Config] | None:
         """
-        Returns a list of all configurations in the database.
+        Returns a list of all configurations in the database, or in `snapshot`
+        if given.
         """
-        response = [dict(config) for config in self.database]
+        if snapshot is None:
+            snapshot = self._snapshot
+        response = [dict(config) for config in snapshot.records]
         if len(response) > 0:
             return response
         return None
 
+    @staticmethod
+    def _check_version(config: Config, if_match: Collection[int] | None) -> None:
+        if if_match is not None and config.version not in if_match:
+            raise VersionConflict(config.name, config.version)
+
+    @tracer.traced("connector.create_config")
     def create_config(self, config: Config) -> tuple[bool, dict]:
         """
-        Creates a new configuration and adds it to the database.
+        Creates a new configuration at the next version and adds it to the
+        database.
         Saves the updated database to the file.
         Returns the created configuration.
         """
         try:
-            self.database.append(config)
-            self.save_database()
+            with self._write_lock:
+                config = config.copy(update={"version": self._next_version()})
+                records = self._snapshot.records + (config,)
+                self.save_database(records)
+                self._publish(records, position=len(records) - 1)
             logger.info(f"Created config {config.name}")
-            self.clear_cache()
             return True, dict(config)
         except Exception as e:
             logger.error(f"{e}")
             return False, Config(name="Error", metadata={"Error": "Error"})
 
-    @logger.catch
+    @tracer.traced("connector.get_config")
     def get_config(self, name: str) -> Config:
         """
         Retrieves a configuration by its name from the database.
+        This is a lookup in the snapshot's name index, so there is no scan
+        for concurrent callers to share.
         Returns the configuration if found, or None if not found.
         """
-        for config in self.database:
-            if config.name == name:
-                return dict(config)
+        config = self._snapshot.get(name)
+        if config is not None:
+            return dict(config)
         return None
 
-
-    def update_config(self, name: str, config: Config) -> tuple[bool, dict]:
+    @tracer.traced("connector.update_config")
+    def update_config(
+        self, name: str, config: Config, if_match: Collection[int] | None = None
+    ) -> tuple[bool, dict]:
         """
-        Updates an existing configuration in the database.
+        Updates an existing configuration in the database and bumps its version.
+        If `if_match` is given, the update only happens if the current version
+        is one of them, otherwise VersionConflict is raised.
         Saves the updated database to the file.
         Returns the updated configuration if found, or None if not found.
         """
-        for i, existing_config in enumerate(self.database):
-            if existing_config.name == name:
-                self.database[i] = config
-                self.save_database()
-                self.clear_cache()
+        with self._write_lock:
+            snapshot = self._snapshot
+            position = snapshot.positions.get(name)
+            if position is not None:
+                existing_config = snapshot.records[position]
+                self._check_version(existing_config, if_match)
+                config = config.copy(update={"version": self._next_version()})
+                records = list(snapshot.records)
+                records[position] = config
+                self.save_database(records)
+                self._publish(records, position=position)
                 logger.info(f"Updated config {config.name}")
                 return True, dict(config)
         logger.info(f"Config {name} not found")
         return False, None
 
+    @tracer.traced("connector.patch_config")
+    def patch_config(
+        self,
+        name: str,
+        patch: dict | list,
+        kind: str = "merge",
+        if_match: Collection[int] | None = None,
+    ) -> tuple[bool, dict | None]:
+        """
+        Applies a patch to an existing configuration and bumps its version.
+        `kind` is "merge" for an RFC 7386 merge patch or "json-patch" for an
+        RFC 6902 JSON Patch. Only the changed paths are journaled and only
+        cached searches that can be affected by them are invalidated.
+        Raises PatchError if the patch is invalid or cannot be applied,
+        IngestError if the patched config exceeds the size or depth limits, and
+        VersionConflict if `if_match` is given and does not hold the current version.
+        Returns the patched configuration if found, or None if not found.
+        """
+        with self._write_lock:
+            return self._patch_config(name, patch, kind, if_match)
+
+    def _patch_config(
+        self,
+        name: str,
+        patch: dict | list,
+        kind: str,
+        if_match: Collection[int] | None,
+    ) -> tuple[bool, dict | None]:
+        snapshot = self._snapshot
+        position = snapshot.positions.get(name)
+        if position is None:
+            logger.info(f"Config {name} not found")
+            return False, None
 
-    def delete_config(self, name: str) -> tuple[bool, int]:
+        existing_config = snapshot.records[position]
+        self._check_version(existing_config, if_match)
+        document = dict(existing_config)
+        if kind == "merge":
+            if not isinstance(patch, dict):
+                raise PatchError("A merge patch for a config must be an object")
+            document, changed = merge_patch(document, patch)
+        elif kind == "json-patch":
+            document, changed = json_patch(document, patch)
+        else:
+            raise PatchError(f"Unsupported patch type '{kind}'")
+        if not changed:
+            return True, dict(existing_config)
+
+        if set(document) - {"name", "metadata", "version"}:
+            raise PatchError("A config only has 'name' and 'metadata'")
+        if document.get("name") != name:
+            raise PatchError("The name of a config cannot be patched")
+        if any(path[:1] == ("version",) for path in changed):
+            raise PatchError("The version of a config is managed by the service")
+        # a patch must not grow a config past what a create would accept
+        check_document(document, self.config_max_bytes, self.config_max_depth)
+        document["version"] = self._next_version()
+        changed.append(("version",))
+        try:
+            config = Config(**document)
+        except ValueError as e:
+            raise PatchError(str(e)) from None
+
+        records = list(snapshot.records)
+        records[position] = config
+        self._append_journal(name, _delta(document, changed), records)
+        self._publish(records, name, changed, position)
+        logger.info(f"Patched config {name}")
+        return True, dict(config)
+
+    def _invalidate(self, name: str, changed: List[Path]) -> None:
         """
-        Deletes a configuration from the database by its name.
-        Saves the updated database to the file.
+        Drops cached searches that a change to config `name` can affect: those
+        whose key overlaps a changed path, and those whose results contain the
+        config. Other cached searches are kept.
+        Must be called with the cache lock held.
         """
-        counter = 0
-        replica = self.database.copy()  # to avoid runtime error
-        for i, config in enumerate(replica):
-            if config.name == name:
-                del self.database[i]
-                counter += 1
+        for query, results in list(self._search_cache.items()):
+            keys = parse_query(query).path
+            overlaps = any(
+                keys[: len(path)] == path or path[: len(keys)] == keys
+                for path in changed
+            )
+            if overlaps or any(result["name"] == name for result in results):
+                del self._search_cache[query]
 
-        self.save_database()
-        self.clear_cache()
+    @tracer.traced("connector.delete_config")
+    def delete_config(
+        self, name: str, if_match: Collection[int] | None = None
+    ) -> tuple[bool, int]:
+        """
+        Deletes all configurations with the given name from the database.
+        If `if_match` is given, the delete only happens if the current version
+        is one of them, otherwise VersionConflict is raised.
+        Saves the updated database to the file.
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            existing_config = snapshot.get(name)
+            if existing_config is not None:
+                self._check_version(existing_config, if_match)
+            records = [config for config in snapshot.records if config.name != name]
+            counter = len(snapshot.records) - len(records)
+            if counter > 0:
+                self.save_database(records)
+                self._publish(records)
 
         logger.info(f"Deleted {counter} configs for {name}")
         if counter > 0:
             return True, counter
         return False, counter
 
-    @logger.catch
+    @tracer.traced("connector.bulk_upsert")
+    def bulk_upsert(self, configs: Sequence[Config]) -> tuple[int, int]:
+        """
+        Creates or replaces a batch of configurations with a single save of the
+        database. Every config gets the next version; when a name repeats
+        within the batch the last one wins.
+        Returns the number of created and updated configurations.
+        """
+        created = updated = 0
+        if not configs:
+            return created, updated
+        with self._write_lock:
+            snapshot = self._snapshot
+            records = list(snapshot.records)
+            positions = dict(snapshot.positions)
+            for config in configs:
+                position = positions.get(config.name)
+                config = config.copy(update={"version": self._next_version()})
+                if position is None:
+                    positions[config.name] = len(records)
+                    records.append(config)
+                    created += 1
+                else:
+                    records[position] = config
+                    updated += 1
+            self.save_database(records)
+            self._publish(records)
+        logger.info(f"Imported {len(configs)} configs")
+        return created, updated
+
+    @tracer.traced("connector.search")
     def search(self, query: str) -> List[dict]:
         """
         Searches for configurations in the database that match the given query.
-        The query should be in the format "key1.key2.key3...=value".
+        The query should be in the format "key1.key2.key3...=value", where
+        the operator is one of `=`, `==`, `>`, `>=`, `<`, `<=` (see Query).
+        A secondary index declared on the path is used if it serves the
+        operator, otherwise every record is scanned.
+        Results are cached until the next write, and concurrent identical
+        queries on a cold cache share a single scan. With a shared cache,
+        results are also reused across processes holding the same revision.
+        Raises ValueError if the query is malformed.
         Returns a list of matching configurations.
         """
-        results = []
-        keys, value = query.split("=")[0].split("."), query.split("=")[1]
-        logger.debug(f"Searching for {query}")
+        cached = self._search_cache.get(query)
+        if cached is not None:
+            return cached
+        snapshot = self._snapshot
+        return self._flight.run(
+            ("search", query, snapshot.generation),
+            self._search_and_cache,
+            query,
+            snapshot,
+        )
 
-        def search_helper(data, current_keys):
-            if not current_keys:
-                return True
+    def _search_and_cache(self, query: str, snapshot: Snapshot) -> List[dict]:
+        results = self._shared_search(query, snapshot)
+        with self._cache_lock:
+            if snapshot is self._snapshot:
+                if len(self._search_cache) >= self.cache_size:
+                    # evict the oldest entry, dicts keep insertion order
+                    del self._search_cache[next(iter(self._search_cache))]
+                self._search_cache[query] = results
+        return results
 
-            key = current_keys[0]
-            if key in data:
-                if len(current_keys) == 1:
-                    return str(data[key]).lower() == value.lower()
-                return search_helper(data[key], current_keys[1:])
+    def _shared_search(self, query: str, snapshot: Snapshot) -> List[dict]:
+        """
+        Looks the search up in the shared cache before scanning, so a query
+        scanned by one process is not scanned again by the others. Failures of
+        the shared cache only cost the scan.
+        """
+        if self.shared_cache is None:
+            return self._search(query, snapshot)
+        key = f"search:{snapshot.revision}:{query}"
+        try:
+            cached = self.shared_cache.get(key)
+        except Exception as e:
+            lookup_logger.warning("Shared cache lookup failed: {}", e)
+            cached = None
+        if cached is not None:
+            SHARED_CACHE.labels("hit").inc()
+            return json.loads(cached)
+        SHARED_CACHE.labels("miss").inc()
+        results = self._search(query, snapshot)
+        try:
+            self.shared_cache.set(key, json.dumps(results).encode("utf-8"))
+        except Exception as e:
+            update_logger.warning("Shared cache update failed: {}", e)
+        return results
 
-            return False
+    @staticmethod
+    def _search(query: str, snapshot: Snapshot) -> List[dict]:
+        plan = choose_plan(parse_query(query), snapshot.indexes)
+        # brace formatting is only done if the record is emitted
+        plan_logger.debug("Searching for {} with {}", query, plan.strategy)
 
-        for config in self.database:
-            if search_helper(dict(config), keys):
-                results.append(dict(config))
+        if plan.index is not None:
+            positions = plan.index.lookup(plan.query)
+            results = [dict(snapshot.records[position]) for position in positions]
+            examined = len(positions)
+        else:
+            results = []
+            for config in snapshot.records:
+                document = dict(config)
+                if plan.query.matches(document):
+                    results.append(document)
+            examined = len(snapshot.records)
 
-        logger.info(f"Found {len(results)} configs for {query}")
+        SEARCH_PLANS.labels(plan.strategy, path_label(plan.query.path)).inc()
+        RECORDS_EXAMINED.labels(plan.strategy).observe(examined)
+        results_logger.info("Found {} configs for {}", len(results), query)
         return results
 
+    @tracer.traced("connector.explain")
+    def explain(self, query: str) -> dict:
+        """
+        Describes how `query` would be executed against the current snapshot
+        without running it: whether an index or a scan is used and why, and
+        how many records would be examined.
+        Raises ValueError if the query is malformed.
+        """
+        snapshot = self._snapshot
+        plan = choose_plan(parse_query(query), snapshot.indexes)
+        if plan.index is not None:
+            examined = len(plan.index.lookup(plan.query))
+        else:
+            examined = len(snapshot.records)
+        return {
+            "query": query,
+            "path": ".".join(plan.query.path),
+            "operator": plan.query.operator,
+            "strategy": plan.strategy,
+            "reason": plan.reason,
+            "index": None if plan.index is None else plan.index.describe(),
+            "records_total": len(snapshot.records),
+            "records_examined": examined,
+            "cached": query in self._search_cache,
+        }
+
+
+def _delta(document: dict, changed: List[Path]) -> dict:
+    """
+    Describes a change as the new values of the changed paths ("set") and the
+    paths that no longer exist ("unset"). Replaying a delta is idempotent.
+    """
+    delta = {"set": [], "unset": []}
+    for path in changed:
+        node = document
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                delta["unset"].append(list(path))
+                break
+            node = node[key]
+        else:
+            delta["set"].append([list(path), node])
+    return delta
+
+
+def _write_atomically(path: str, write: Callable[[TextIO], object]) -> None:
+    """
+    Writes a temporary file and swaps it in, so that a crash never leaves a
+    partially written file behind.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _delta_version(delta: dict) -> int:
+    """
+    The version a delta brings its config to, every patch sets it.
+    """
+    for path, value in delta.get("set", []):
+        if path == ["version"]:
+            return value
+    return 0
+
+
+def _apply_delta(document: dict, delta: dict) -> dict:
+    for path, value in delta.get("set", []):
+        document = _assign(document, path, value)
+    for path in delta.get("unset", []):
+        document = _assign(document, path, _UNSET)
+    return document
+
+
+_UNSET = object()
+
+
+def _assign(node: dict, path: List[str], value) -> dict:
+    node = dict(node)
+    key = path[0]
+    if len(path) > 1:
+        child = node.get(key)
+        node[key] = _assign(child if isinstance(child, dict) else {}, path[1:], value)
+    elif value is _UNSET:
+        node.pop(key, None)
+    else:
+        node[key] = value
+    return node
+
 
-connector_instance = Connector(settings.database_path)
+connector_instance = Connector(
+    settings.database_path,
+    cache_size=settings.search_cache_size,
+    journal_limit=settings.journal_limit,
+    shared_cache=get_cache_backend(),
+    index_specs=settings.search_indexes,
+    config_max_bytes=settings.config_max_bytes,
+    config_max_depth=settings.config_max_depth,
+)
+REGISTRY.register(IndexMemoryCollector(lambda: connector_instance.snapshot.indexes))
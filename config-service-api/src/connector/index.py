@@ -0,0 +1,327 @@
+import bisect
+import sys
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import cached_property
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Sequence, Tuple
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from connector.patch import Path
+from connector.query import MISSING, RANGE_OPERATORS, Query, number, resolve, text
+from models.config import Config
+from monitoring import NAMESPACE, SUBSYSTEM
+
+SEARCH_PLANS = Counter(
+    "search_plans_total",
+    "Number of searches executed per strategy and query path.",
+    labelnames=("strategy", "path"),
+    namespace=NAMESPACE,
+    subsystem=SUBSYSTEM,
+)
+RECORDS_EXAMINED = Histogram(
+    "search_records_examined",
+    "Number of records examined by a search.",
+    labelnames=("strategy",),
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000, float("inf")),
+    namespace=NAMESPACE,
+    subsystem=SUBSYSTEM,
+)
+
+# query paths are user input, cap how many get their own label value
+MAX_PATH_LABELS = 100
+_path_labels: set = set()
+
+
+def path_label(path: Path) -> str:
+    label = ".".join(path)
+    if label not in _path_labels:
+        if len(_path_labels) >= MAX_PATH_LABELS:
+            return "other"
+        _path_labels.add(label)
+    return label
+
+
+class SecondaryIndex(ABC):
+    """
+    An immutable index over the values at one path of every config, built
+    for a database snapshot. `updated` derives the index of the next snapshot
+    when a single record changes, sharing everything it does not touch.
+    """
+
+    path: Path
+    kind: str
+    operators: FrozenSet[str] = frozenset()
+
+    @abstractmethod
+    def lookup(self, query: Query) -> List[int]:
+        """
+        Returns the positions, in record order, of the configs matching `query`.
+        """
+
+    @abstractmethod
+    def updated(
+        self, position: int, old: Config | None, new: Config
+    ) -> "SecondaryIndex":
+        """
+        Returns the index with the record at `position` changed from `old`
+        (None when it was appended) to `new`.
+        """
+
+    @property
+    @abstractmethod
+    def memory(self) -> int:
+        """
+        Estimated size of the index in bytes.
+        """
+
+    def describe(self) -> dict:
+        return {
+            "path": ".".join(self.path),
+            "kind": self.kind,
+            "operators": sorted(self.operators),
+        }
+
+
+@dataclass(frozen=True)
+class HashIndex(SecondaryIndex):
+    """
+    Maps the text of each value to the positions holding it. "ci" indexes
+    lower-case the text and serve `=` queries, "exact" indexes keep it as is
+    and serve `==` queries.
+    """
+
+    path: Path
+    kind: str
+    buckets: Mapping[str, FrozenSet[int]]
+
+    @property
+    def operators(self) -> FrozenSet[str]:
+        return frozenset(("=",)) if self.kind == "ci" else frozenset(("==",))
+
+    def key(self, value) -> str:
+        if self.kind == "ci":
+            return str(value).lower()
+        return text(value)
+
+    def _key_of(self, config: Config | None) -> str | None:
+        if config is None:
+            return None
+        found = resolve(dict(config), self.path)
+        return None if found is MISSING else self.key(found)
+
+    @classmethod
+    def build(cls, path: Path, kind: str, records: Sequence[Config]) -> "HashIndex":
+        index = cls(path, kind, MappingProxyType({}))
+        buckets: Dict[str, List[int]] = {}
+        for position, config in enumerate(records):
+            key = index._key_of(config)
+            if key is not None:
+                buckets.setdefault(key, []).append(position)
+        return cls(
+            path,
+            kind,
+            MappingProxyType({key: frozenset(p) for key, p in buckets.items()}),
+        )
+
+    def lookup(self, query: Query) -> List[int]:
+        value = query.value.lower() if self.kind == "ci" else query.value
+        return sorted(self.buckets.get(value, ()))
+
+    def updated(self, position: int, old: Config | None, new: Config) -> "HashIndex":
+        old_key, new_key = self._key_of(old), self._key_of(new)
+        if old_key == new_key:
+            return self
+        buckets = dict(self.buckets)
+        if old_key is not None:
+            remaining = buckets[old_key] - {position}
+            if remaining:
+                buckets[old_key] = remaining
+            else:
+                del buckets[old_key]
+        if new_key is not None:
+            buckets[new_key] = buckets.get(new_key, frozenset()) | {position}
+        return HashIndex(self.path, self.kind, MappingProxyType(buckets))
+
+    @cached_property
+    def memory(self) -> int:
+        return sys.getsizeof(self.buckets) + sum(
+            sys.getsizeof(key) + sys.getsizeof(positions)
+            for key, positions in self.buckets.items()
+        )
+
+
+@dataclass(frozen=True)
+class RangeIndex(SecondaryIndex):
+    """
+    Keeps the numeric values at a path sorted, serving `>`, `>=`, `<` and
+    `<=` queries with a binary search.
+    """
+
+    path: Path
+    keys: Tuple[float, ...]
+    positions: Tuple[int, ...]
+    kind: str = "range"
+    operators: FrozenSet[str] = RANGE_OPERATORS
+
+    def _key_of(self, config: Config | None) -> float | None:
+        if config is None:
+            return None
+        found = resolve(dict(config), self.path)
+        return None if found is MISSING else number(found)
+
+    @classmethod
+    def build(cls, path: Path, kind: str, records: Sequence[Config]) -> "RangeIndex":
+        index = cls(path, (), (), kind)
+        entries = []
+        for position, config in enumerate(records):
+            key = index._key_of(config)
+            if key is not None:
+                entries.append((key, position))
+        entries.sort()
+        return cls(
+            path,
+            tuple(key for key, _ in entries),
+            tuple(position for _, position in entries),
+            kind,
+        )
+
+    def lookup(self, query: Query) -> List[int]:
+        value = query.number
+        if query.operator in (">", ">="):
+            find = bisect.bisect_right if query.operator == ">" else bisect.bisect_left
+            selected = self.positions[find(self.keys, value) :]
+        else:
+            find = bisect.bisect_left if query.operator == "<" else bisect.bisect_right
+            selected = self.positions[: find(self.keys, value)]
+        return sorted(selected)
+
+    def updated(self, position: int, old: Config | None, new: Config) -> "RangeIndex":
+        old_key, new_key = self._key_of(old), self._key_of(new)
+        if old_key == new_key:
+            return self
+        keys, positions = list(self.keys), list(self.positions)
+        if old_key is not None:
+            i = bisect.bisect_left(keys, old_key)
+            while positions[i] != position:
+                i += 1
+            del keys[i], positions[i]
+        if new_key is not None:
+            i = bisect.bisect_right(keys, new_key)
+            # equal keys stay in record order, as when the index is built
+            while i > 0 and keys[i - 1] == new_key and positions[i - 1] > position:
+                i -= 1
+            keys.insert(i, new_key)
+            positions.insert(i, position)
+        return RangeIndex(self.path, tuple(keys), tuple(positions), self.kind)
+
+    @cached_property
+    def memory(self) -> int:
+        # each key is a float object of its own
+        return (
+            sys.getsizeof(self.keys)
+            + sys.getsizeof(self.positions)
+            + len(self.keys) * sys.getsizeof(0.0)
+        )
+
+
+BUILDERS: Dict[str, Callable[[Path, str, Sequence[Config]], SecondaryIndex]] = {
+    "exact": HashIndex.build,
+    "ci": HashIndex.build,
+    "range": RangeIndex.build,
+}
+
+
+def build_indexes(
+    specs: Mapping[str, str], records: Sequence[Config]
+) -> Mapping[Path, SecondaryIndex]:
+    """
+    Builds the indexes declared in `specs`, a mapping of dotted path to kind.
+    """
+    indexes = {}
+    for path, kind in specs.items():
+        keys = tuple(path.split("."))
+        indexes[keys] = BUILDERS[kind](keys, kind, records)
+    return MappingProxyType(indexes)
+
+
+def update_indexes(
+    indexes: Mapping[Path, SecondaryIndex],
+    position: int,
+    old: Config | None,
+    new: Config,
+    changed: Iterable[Path] | None = None,
+) -> Mapping[Path, SecondaryIndex]:
+    """
+    Derives the indexes after the record at `position` changed from `old` to
+    `new`. If the `changed` paths are known, indexes on unrelated paths are
+    reused without looking at the record.
+    """
+    changed = None if changed is None else list(changed)
+    updated = {}
+    for path, index in indexes.items():
+        if changed is not None and not any(
+            path[: len(c)] == c or c[: len(path)] == path for c in changed
+        ):
+            updated[path] = index
+        else:
+            updated[path] = index.updated(position, old, new)
+    return MappingProxyType(updated)
+
+
+@dataclass(frozen=True)
+class Plan:
+    """
+    How a search is executed: with `index`, or by scanning every record.
+    """
+
+    query: Query
+    index: SecondaryIndex | None
+    reason: str
+
+    @property
+    def strategy(self) -> str:
+        return "scan" if self.index is None else "index"
+
+
+def choose_plan(query: Query, indexes: Mapping[Path, SecondaryIndex]) -> Plan:
+    """
+    Uses the index declared on the query path if it serves the query
+    operator, and falls back to a scan otherwise.
+    """
+    index = indexes.get(query.path)
+    if index is None:
+        return Plan(query, None, "no index on path")
+    if query.operator not in index.operators:
+        return Plan(
+            query,
+            None,
+            f"{index.kind} index does not serve '{query.operator}'",
+        )
+    return Plan(query, index, f"{index.kind} index serves '{query.operator}'")
+
+
+class IndexMemoryCollector(Collector):
+    """
+    Reports the memory held by the indexes of the current snapshot when the
+    metrics are scraped, so writes never pay for measuring it.
+    """
+
+    def __init__(self, indexes: Callable[[], Mapping[Path, SecondaryIndex]]) -> None:
+        self.indexes = indexes
+
+    def collect(self):
+        name = "_".join(
+            part for part in (NAMESPACE, SUBSYSTEM, "search_index_memory_bytes") if part
+        )
+        gauge = GaugeMetricFamily(
+            name,
+            "Estimated memory held by each secondary search index.",
+            labels=("path", "kind"),
+        )
+        for path, index in self.indexes().items():
+            gauge.add_metric((".".join(path), index.kind), index.memory)
+        yield gauge
@@ -0,0 +1,225 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+Path = Tuple[str, ...]
+
+
+class PatchError(ValueError):
+    """
+    Raised when a patch document is malformed or cannot be applied.
+    """
+
+
+def merge_patch(target: Any, patch: Any) -> Tuple[Any, List[Path]]:
+    """
+    Applies an RFC 7386 JSON Merge Patch to `target`.
+    The target is not modified: containers along changed paths are copied and
+    everything else is shared with the original.
+    Returns the patched document and the paths whose values changed.
+    """
+    changed: List[Path] = []
+    return _merge(target, patch, (), changed), changed
+
+
+def _merge(target: Any, patch: Any, path: Path, changed: List[Path]) -> Any:
+    if not isinstance(patch, dict):
+        if patch != target:
+            changed.append(path)
+        return patch
+    if not isinstance(target, dict):
+        changed.append(path)
+        return _strip_nulls(patch)
+
+    result = dict(target)
+    for key, value in patch.items():
+        if value is None:
+            if key in result:
+                del result[key]
+                changed.append(path + (key,))
+        elif key in result:
+            result[key] = _merge(result[key], value, path + (key,), changed)
+        else:
+            result[key] = _strip_nulls(value)
+            changed.append(path + (key,))
+    return result
+
+
+def _strip_nulls(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    return {k: _strip_nulls(v) for k, v in value.items() if v is not None}
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """
+    Splits an RFC 6901 JSON Pointer into its unescaped reference tokens.
+    """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise PatchError(f"Invalid JSON pointer '{pointer}'")
+    if not pointer:
+        return []
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def json_patch(target: Any, operations: Any) -> Tuple[Any, List[Path]]:
+    """
+    Applies an RFC 6902 JSON Patch (a list of operations) to `target`.
+    The target is not modified: containers along changed paths are copied.
+    Changes inside arrays are reported at the array's path, since arrays
+    are matched as a whole value.
+    Returns the patched document and the paths whose values changed.
+    """
+    if not isinstance(operations, list):
+        raise PatchError("A JSON Patch document must be an array of operations")
+
+    changed: List[Path] = []
+    document = target
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation:
+            raise PatchError(f"Invalid patch operation {operation!r}")
+        tokens = parse_pointer(operation.get("path"))
+        if not tokens:
+            raise PatchError("Patching the whole document is not supported")
+        apply = OPERATIONS.get(operation["op"])
+        if apply is None:
+            raise PatchError(f"Unsupported patch operation '{operation['op']}'")
+        document, touched = apply(document, tokens, operation)
+        changed.extend(_changed_path(target, t) for t in touched)
+    return document, changed
+
+
+# Each operation returns the patched document and the pointers it changed.
+Operation = Callable[[Any, List[str], dict], Tuple[Any, List[List[str]]]]
+
+
+def _op_test(document: Any, tokens: List[str], operation: dict):
+    if _get(document, tokens) != _value(operation):
+        raise PatchError(f"Test failed at '{operation['path']}'")
+    return document, []
+
+
+def _op_add(document: Any, tokens: List[str], operation: dict):
+    return _add(document, tokens, _value(operation)), [tokens]
+
+
+def _op_remove(document: Any, tokens: List[str], operation: dict):
+    # pylint: disable=unused-argument
+    return _remove(document, tokens)[0], [tokens]
+
+
+def _op_replace(document: Any, tokens: List[str], operation: dict):
+    _get(document, tokens)
+    document = _remove(document, tokens)[0]
+    return _add(document, tokens, _value(operation)), [tokens]
+
+
+def _op_move(document: Any, tokens: List[str], operation: dict):
+    source = _source(operation)
+    if tokens[: len(source)] == source and tokens != source:
+        raise PatchError("Cannot move a value into one of its children")
+    document, value = _remove(document, source)
+    return _add(document, tokens, value), [source, tokens]
+
+
+def _op_copy(document: Any, tokens: List[str], operation: dict):
+    value = _get(document, _source(operation))
+    return _add(document, tokens, value), [tokens]
+
+
+OPERATIONS: Dict[str, Operation] = {
+    "test": _op_test,
+    "add": _op_add,
+    "remove": _op_remove,
+    "replace": _op_replace,
+    "move": _op_move,
+    "copy": _op_copy,
+}
+
+
+def _source(operation: dict) -> List[str]:
+    source = parse_pointer(operation.get("from"))
+    if not source:
+        raise PatchError(f"'{operation['op']}' requires a non-empty 'from' pointer")
+    return source
+
+
+def _value(operation: dict) -> Any:
+    if "value" not in operation:
+        raise PatchError(f"'{operation['op']}' requires a 'value'")
+    return operation["value"]
+
+
+def _changed_path(document: Any, tokens: List[str]) -> Path:
+    path = []
+    for token in tokens:
+        if not isinstance(document, dict):
+            break
+        path.append(token)
+        document = document.get(token)
+    return tuple(path)
+
+
+def _index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index '{token}'")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index '{token}' out of range")
+    return index
+
+
+def _get(document: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise PatchError(f"Path '/{'/'.join(tokens)}' does not exist")
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_index(document, token, allow_end=False)]
+        else:
+            raise PatchError(f"Path '/{'/'.join(tokens)}' does not exist")
+    return document
+
+
+def _copy(container: Any) -> Any:
+    if isinstance(container, dict):
+        return dict(container)
+    if isinstance(container, list):
+        return list(container)
+    raise PatchError("Cannot address into a scalar value")
+
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    root = _copy(document)
+    parent = root
+    for token in tokens[:-1]:
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise PatchError(f"Path '/{'/'.join(tokens)}' does not exist")
+            parent[token] = _copy(parent[token])
+            parent = parent[token]
+        else:
+            index = _index(parent, token, allow_end=False)
+            parent[index] = _copy(parent[index])
+            parent = parent[index]
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    else:
+        parent.insert(_index(parent, last, allow_end=True), value)
+    return root
+
+
+def _remove(document: Any, tokens: List[str]) -> Tuple[Any, Any]:
+    _get(document, tokens)
+    root = _copy(document)
+    parent = root
+    for token in tokens[:-1]:
+        key = token if isinstance(parent, dict) else _index(parent, token, False)
+        parent[key] = _copy(parent[key])
+        parent = parent[key]
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        return root, parent.pop(last)
+    return root, parent.pop(_index(parent, last, allow_end=False))
@@ -0,0 +1,81 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+# marks a requested path that ends at this node
+_WHOLE = None
+
+
+@dataclass(frozen=True)
+class Projection:
+    """
+    A compiled set of dotted field paths, using the same syntax as search keys
+    (e.g. "name,metadata.key1.key2"), that can be applied to config records.
+    """
+
+    paths: tuple[str, ...]
+    tree: Dict[str, Any]
+
+    @classmethod
+    def from_query(cls, fields: str | None) -> "Projection | None":
+        """
+        Compiles the `fields` query parameter, or returns None if it was not given.
+        """
+        if fields is None:
+            return None
+        return cls.parse(fields)
+
+    @classmethod
+    def parse(cls, fields: str) -> "Projection":
+        """
+        Compiles a comma separated list of dotted paths.
+        Raises ValueError if a path is empty or has an empty segment.
+        """
+        paths = sorted({path.strip() for path in fields.split(",")})
+        tree: Dict[str, Any] = {}
+        for path in paths:
+            keys = path.split(".")
+            if not all(keys):
+                raise ValueError(f"Invalid field path '{path}'")
+            node = tree
+            for key in keys[:-1]:
+                child = node.setdefault(key, {})
+                if child is _WHOLE:
+                    # a shorter path already selects the whole subtree
+                    break
+                node = child
+            else:
+                node[keys[-1]] = _WHOLE
+        return cls(tuple(paths), tree)
+
+    @property
+    def digest(self) -> str:
+        """
+        A short stable identifier of the projection, for cache keys and ETags.
+        """
+        return hashlib.blake2b(
+            ",".join(self.paths).encode("utf-8"), digest_size=8
+        ).hexdigest()
+
+    def apply(self, record: dict) -> dict:
+        """
+        Returns a new dict containing only the selected paths of `record`.
+        Paths that do not exist in the record are omitted.
+        """
+        return _project(record, self.tree)
+
+    def apply_all(self, records: List[dict]) -> List[dict]:
+        return [_project(record, self.tree) for record in records]
+
+
+def _project(data: dict, tree: Dict[str, Any]) -> dict:
+    result = {}
+    for key, subtree in tree.items():
+        if key not in data:
+            continue
+        value = data[key]
+        if subtree is _WHOLE:
+            result[key] = value
+        elif isinstance(value, dict):
+            result[key] = _project(value, subtree)
+    return result
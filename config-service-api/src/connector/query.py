@@ -0,0 +1,107 @@
+import json
+import math
+import re
+from dataclasses import dataclass
+from operator import ge, gt, le, lt
+from typing import Any
+
+from connector.patch import Path
+
+# longest operators first so that "==" is not read as "="
+QUERY = re.compile(r"^([^=<>]*)(==|>=|<=|=|>|<)(.*)$", re.DOTALL)
+
+COMPARISONS = {">": gt, ">=": ge, "<": lt, "<=": le}
+
+RANGE_OPERATORS = frozenset(COMPARISONS)
+
+MISSING = object()
+
+
+@dataclass(frozen=True)
+class Query:
+    """
+    A parsed search query: the dotted `path` of a value, an operator and the
+    value to compare with.
+
+    - `=` compares the text of the value case-insensitively
+    - `==` compares the text of the value exactly
+    - `>`, `>=`, `<`, `<=` compare numbers, non-numeric values never match
+    """
+
+    path: Path
+    operator: str
+    value: str
+
+    @property
+    def number(self) -> float:
+        return float(self.value)
+
+    def matches(self, document: dict) -> bool:
+        """
+        Returns True if the value at `path` in `document` satisfies the query.
+        """
+        found = resolve(document, self.path)
+        if found is MISSING:
+            return False
+        if self.operator == "=":
+            return str(found).lower() == self.value.lower()
+        if self.operator == "==":
+            return text(found) == self.value
+        found = number(found)
+        return found is not None and COMPARISONS[self.operator](found, self.number)
+
+
+def parse_query(query: str) -> Query:
+    """
+    Parses a "key1.key2.key3...<operator>value" query.
+    Raises ValueError if the query is malformed.
+    """
+    match = QUERY.match(query)
+    if match is None:
+        raise ValueError(f"Invalid query '{query}'")
+    path, operator, value = match.groups()
+    keys = tuple(path.split("."))
+    if not all(keys):
+        raise ValueError(f"Invalid query '{query}'")
+    if operator in RANGE_OPERATORS and number(value) is None:
+        raise ValueError(f"'{operator}' needs a number, got '{value}'")
+    return Query(keys, operator, value)
+
+
+def resolve(document: Any, path: Path) -> Any:
+    """
+    Returns the value at `path` in `document`, or MISSING if there is none.
+    """
+    for key in path:
+        if not isinstance(document, dict) or key not in document:
+            return MISSING
+        document = document[key]
+    return document
+
+
+def text(value: Any) -> str:
+    """
+    The text `==` compares: strings as they are, anything else as JSON.
+    """
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True)
+
+
+def number(value: Any) -> float | None:
+    """
+    The number range operators compare: numbers and numeric strings, or
+    None for anything else.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        value = float(value)
+    elif isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    else:
+        return None
+    return value if math.isfinite(value) else None
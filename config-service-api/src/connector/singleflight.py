@@ -0,0 +1,61 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable
+
+
+@dataclass
+class _Call:
+    """
+    A single in-flight computation shared by every caller with the same key.
+    """
+
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException | None = None
+
+
+@dataclass
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single execution.
+    The first caller for a key runs the function, callers arriving while it is
+    still running wait for it and receive the same result (or exception).
+    """
+
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _calls: Dict[Hashable, _Call] = field(default_factory=dict)
+
+    def run(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs `func(*args)` unless a call with the same key is already in flight,
+        in which case it waits for that call and returns its result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """
+        Returns the number of keys currently being computed.
+        """
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,89 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, Mapping
+
+from connector.index import SecondaryIndex
+from connector.patch import Path
+from models.config import Config
+
+# record digests are summed modulo this, it keeps the revision at 128 bits
+DIGEST_MODULUS = 1 << 128
+
+
+def record_digest(position: int, config: Config | None) -> int:
+    """
+    The part the record at `position` contributes to the revision of a
+    snapshot, 0 for no record.
+    """
+    if config is None:
+        return 0
+    payload = json.dumps([position, dict(config)], sort_keys=True)
+    digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest, "big")
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    An immutable, versioned view of the database, its name index and the
+    secondary indexes declared for searches.
+    Writers build a new snapshot and publish it with a single reference swap,
+    so readers holding a snapshot always see a complete, consistent dataset
+    without taking a lock.
+    """
+
+    generation: int
+    records: tuple[Config, ...]
+    positions: Mapping[str, int]
+    indexes: Mapping[Path, SecondaryIndex] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    digest: int = 0
+
+    @classmethod
+    def build(
+        cls,
+        generation: int,
+        records: Iterable[Config],
+        indexes: Mapping[Path, SecondaryIndex] | None = None,
+        digest: int | None = None,
+    ) -> "Snapshot":
+        """
+        Builds a snapshot of `records`. `digest` is the sum of their record
+        digests if the caller derived it from the previous snapshot, it is
+        computed from every record otherwise.
+        """
+        records = tuple(records)
+        positions = {}
+        for i, config in enumerate(records):
+            # the first config with a name is the one returned by lookups
+            positions.setdefault(config.name, i)
+        if indexes is None:
+            indexes = MappingProxyType({})
+        if digest is None:
+            digest = sum(record_digest(i, config) for i, config in enumerate(records))
+        return cls(
+            generation,
+            records,
+            MappingProxyType(positions),
+            indexes,
+            digest % DIGEST_MODULUS,
+        )
+
+    def get(self, name: str) -> Config | None:
+        position = self.positions.get(name)
+        if position is None:
+            return None
+        return self.records[position]
+
+    @property
+    def revision(self) -> str:
+        """
+        A digest of the snapshot contents. It is identical across processes
+        holding the same data, which makes it usable as an ETag.
+        It is the sum of a digest per record and position, so a write to one
+        record derives it from the previous snapshot and reading it is free.
+        """
+        return f"{self.digest:032x}"
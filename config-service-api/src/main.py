@@ -3,9 +3,13 @@ import uvicorn
 from fastapi import FastAPI
 from routers.router import api_router
 
-from settings import settings
+from settings import settings, configure_logging
 
 from monitoring import instrumentator
+from middleware.admission import AdmissionControlMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.tracing import TracingMiddleware
+from tracing import tracer
 
 from loguru import logger
 
@@ -21,12 +25,31 @@ def get_application() -> FastAPI:
         openapi_tags=settings.tag_metadata,
     )
     application.include_router(api_router)
-    instrumentator.instrument(application).expose(
-        application, include_in_schema=False, should_gzip=True
+    # innermost, so compression counts towards the admitted work of a request
+    application.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        cache_size=settings.compression_cache_size,
+        levels=settings.compression_levels,
     )
+    if settings.admission_control:
+        application.add_middleware(
+            AdmissionControlMiddleware,
+            route_limits=settings.admission_route_limits,
+            default_limit=settings.admission_default_limit,
+            max_queue=settings.admission_max_queue,
+            target_ms=settings.admission_target_ms,
+            interval_ms=settings.admission_interval_ms,
+            priority_paths=settings.admission_priority_paths,
+        )
+    # added after admission control so that shed requests are traced too
+    application.add_middleware(TracingMiddleware, tracer=tracer)
+    application.add_event_handler("shutdown", tracer.exporter.shutdown)
+    instrumentator.instrument(application).expose(application, include_in_schema=False)
     return application
 
 
+configure_logging(settings)
 config_service = get_application()
 
 if __name__ == "__main__":
@@ -38,3 +61,4 @@ if __name__ == "__main__":
         log_level="info",
     )
     logger.info("Config service shutdown")
+    logger.complete()
@@ -0,0 +1,200 @@
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List
+
+from prometheus_client import Counter, Gauge
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.responses import JSONResponse
+
+from monitoring import NAMESPACE, SUBSYSTEM
+
+QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Number of requests waiting for an admission slot.",
+    labelnames=("route",),
+    namespace=NAMESPACE,
+    subsystem=SUBSYSTEM,
+)
+IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Number of admitted requests currently executing.",
+    labelnames=("route",),
+    namespace=NAMESPACE,
+    subsystem=SUBSYSTEM,
+)
+REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Number of requests shed by admission control.",
+    labelnames=("route", "reason"),
+    namespace=NAMESPACE,
+    subsystem=SUBSYSTEM,
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request cannot be admitted.
+    """
+
+    def __init__(self, status_code: int, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class RouteLimiter:
+    """
+    Concurrency limiter for a single route with a bounded FIFO queue.
+
+    The queue timeout adapts to load in the style of CoDel: while queueing
+    delay stays under `target` a request may wait up to `interval`, but once
+    the delay has been above `target` for a full `interval` the route is
+    considered overloaded and waiters are shed after `target` instead.
+    """
+
+    route: str
+    limit: int
+    max_queue: int
+    target: float
+    interval: float
+    in_flight: int = 0
+    overloaded: bool = False
+    _first_above: float = 0.0
+    _waiters: Deque[asyncio.Future] = field(default_factory=deque)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.interval))
+
+    def _observe(self, delay: float, now: float) -> None:
+        """
+        Feeds a queueing delay sample into the overload detector.
+        """
+        if delay < self.target:
+            self._first_above = 0.0
+            self.overloaded = False
+        elif self._first_above == 0.0:
+            self._first_above = now + self.interval
+        elif now >= self._first_above:
+            self.overloaded = True
+
+    async def acquire(self) -> None:
+        """
+        Waits for a slot on this route.
+        Raises AdmissionRejected if the queue is full or the wait exceeds the current timeout.
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            IN_FLIGHT.labels(self.route).inc()
+            self._observe(0.0, time.monotonic())
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            REJECTIONS.labels(self.route, "queue_full").inc()
+            raise AdmissionRejected(429, "Too many queued requests", self.retry_after)
+
+        started = time.monotonic()
+        timeout = self.target if self.overloaded else self.interval
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        QUEUE_DEPTH.labels(self.route).set(len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            REJECTIONS.labels(self.route, "queue_timeout").inc()
+            raise AdmissionRejected(
+                503, "Service overloaded", self.retry_after
+            ) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just as we were cancelled
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            QUEUE_DEPTH.labels(self.route).set(len(self._waiters))
+            now = time.monotonic()
+            self._observe(now - started, now)
+
+    def release(self) -> None:
+        """
+        Releases a slot, handing it directly to the oldest live waiter if any.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                QUEUE_DEPTH.labels(self.route).set(len(self._waiters))
+                return
+        self.in_flight -= 1
+        IN_FLIGHT.labels(self.route).dec()
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying per-route concurrency limits and load shedding.
+    Requests that cannot be admitted in time are answered immediately with
+    429/503 and a Retry-After header instead of piling up in the event loop.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        route_limits: Dict[str, int],
+        default_limit: int,
+        max_queue: int,
+        target_ms: float,
+        interval_ms: float,
+        priority_paths: List[str],
+    ) -> None:
+        self.app = app
+        self.priority_paths = frozenset(priority_paths)
+        # longest prefix first so that nested routes win
+        self.prefixes = sorted(route_limits, key=len, reverse=True)
+        self.limiters: Dict[str, RouteLimiter] = {
+            route: RouteLimiter(
+                route, limit, max_queue, target_ms / 1000, interval_ms / 1000
+            )
+            for route, limit in route_limits.items()
+        }
+        self.limiters["default"] = RouteLimiter(
+            "default", default_limit, max_queue, target_ms / 1000, interval_ms / 1000
+        )
+
+    def limiter_for(self, path: str) -> RouteLimiter:
+        for prefix in self.prefixes:
+            if path.startswith(prefix):
+                return self.limiters[prefix]
+        return self.limiters["default"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.priority_paths:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter_for(scope["path"])
+        try:
+            await limiter.acquire()
+        except AdmissionRejected as rejected:
+            response = JSONResponse(
+                status_code=rejected.status_code,
+                content={"detail": rejected.reason},
+                headers={"Retry-After": str(rejected.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
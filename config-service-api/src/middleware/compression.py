@@ -0,0 +1,365 @@
+import hashlib
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from prometheus_client import Counter
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monitoring import NAMESPACE, SUBSYSTEM
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip is always available
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, only gzip is always available
+    zstandard = None
+
+COMPRESSION_CACHE = Counter(
+    "compression_cache_total",
+    "Number of compressed responses served from or added to the compression cache.",
+    labelnames=("encoding", "result"),
+    namespace=NAMESPACE,
+    subsystem=SUBSYSTEM,
+)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/problem+json",
+)
+
+
+class StreamCompressor(ABC):
+    """
+    Incrementally compresses a streamed body. Every `compress` call returns
+    data the client can decode right away, so streamed lines are not held
+    back until the end of the response.
+    """
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compresses the next part of the body.
+        """
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """
+        Returns the end of the compressed body.
+        """
+
+
+class GzipCompressor(StreamCompressor):
+    def __init__(self, level: int) -> None:
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor(StreamCompressor):
+    def __init__(self, level: int) -> None:
+        self._brotli = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self) -> bytes:
+        return self._brotli.finish()
+
+
+class ZstdCompressor(StreamCompressor):
+    def __init__(self, level: int) -> None:
+        self._zstd = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zstd.compress(data) + self._zstd.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+@dataclass(frozen=True)
+class Codec:
+    """
+    A content coding: one-shot compression for complete bodies and a
+    streaming compressor for bodies sent in several messages.
+    """
+
+    name: str
+    level: int
+    compressor: Callable[[int], StreamCompressor]
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = self.compressor(self.level)
+        return compressor.compress(data) + compressor.finish()
+
+    def stream(self) -> StreamCompressor:
+        return self.compressor(self.level)
+
+
+def available_codecs(levels: Dict[str, int]) -> Dict[str, Codec]:
+    """
+    Returns the codecs that can be used in this environment, in order of
+    preference, with their compression level taken from `levels`.
+    """
+    codecs = {}
+    if brotli is not None:
+        codecs["br"] = Codec("br", levels.get("br", 4), BrotliCompressor)
+    if zstandard is not None:
+        codecs["zstd"] = Codec("zstd", levels.get("zstd", 3), ZstdCompressor)
+    codecs["gzip"] = Codec("gzip", levels.get("gzip", 6), GzipCompressor)
+    return codecs
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Parses an `Accept-Encoding` header into a mapping of coding to q-value.
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header: str | None, codecs: Dict[str, Codec]) -> Codec | None:
+    """
+    Chooses the codec with the highest q-value in the `Accept-Encoding`
+    header, preferring earlier codecs on ties. Returns None if the client
+    accepts none of them.
+    """
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name, codec in codecs.items():
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies with the best encoding the
+    client accepts (gzip, and brotli or zstd when installed).
+
+    Bodies smaller than `minimum_size` are sent as they are. Complete bodies
+    of GET responses carrying an ETag are compressed once per content: the
+    compressed bytes are kept in an LRU cache keyed by a digest of the body
+    and the encoding. Streamed bodies are compressed incrementally as they
+    are sent.
+
+    A compressed response is a different representation from the identity
+    one, so its ETag gets the encoding as a suffix (`"3"` becomes `"3-gzip"`).
+    The suffix is stripped from `If-Match` and `If-None-Match` before the
+    request reaches the application, which only knows the plain tags.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        cache_size: int,
+        levels: Dict[str, int],
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache_size = cache_size
+        self.codecs = available_codecs(levels)
+        self._cache: OrderedDict[Tuple[bytes, str], bytes] = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        codec = choose_encoding(headers.get("accept-encoding"), self.codecs)
+        responder = CompressionResponder(self, scope, send, codec)
+        if "if-match" in headers or "if-none-match" in headers:
+            scope = dict(scope, headers=self.plain_preconditions(scope["headers"]))
+        await self.app(scope, receive, responder.send)
+
+    def plain_preconditions(self, headers: List[Tuple[bytes, bytes]]) -> list:
+        """
+        Strips the encoding suffix from the tags of the precondition headers.
+        """
+        plain = []
+        for name, value in headers:
+            if name.lower() in (b"if-match", b"if-none-match"):
+                for codec in self.codecs:
+                    value = value.replace(f'-{codec}"'.encode("latin-1"), b'"')
+            plain.append((name, value))
+        return plain
+
+    def cached(self, key: tuple, data: bytes, codec: Codec) -> bytes:
+        """
+        Returns the compressed `data`, from the cache if it was compressed before.
+        """
+        compressed = self._cache.get(key)
+        if compressed is not None:
+            self._cache.move_to_end(key)
+            COMPRESSION_CACHE.labels(codec.name, "hit").inc()
+            return compressed
+        compressed = codec.compress(data)
+        if self.cache_size > 0:
+            if len(self._cache) >= self.cache_size:
+                self._cache.popitem(last=False)
+            self._cache[key] = compressed
+        COMPRESSION_CACHE.labels(codec.name, "miss").inc()
+        return compressed
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+
+class CompressionResponder:
+    """
+    Wraps `send` for a single response. The start message is held back until
+    enough of the body is known to decide whether to compress it.
+    """
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        scope: Scope,
+        send: Send,
+        codec: Codec | None,
+    ) -> None:
+        self.middleware = middleware
+        self.scope = scope
+        self.downstream = send
+        self.codec = codec
+        self.start: Message | None = None
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.stream: StreamCompressor | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+            if compressible:
+                MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+            self.passthrough = (
+                self.codec is None
+                or not compressible
+                or "content-encoding" in headers
+                or message["status"] in (204, 304)
+            )
+            if message["status"] == 304 and self.codec is not None:
+                # answer with the tag of the representation the client holds
+                requested = Headers(scope=self.scope).get("if-none-match", "")
+                etag = headers.get("etag")
+                if etag and encoded_etag(etag, self.codec.name) in requested:
+                    self.encode_etag(MutableHeaders(scope=message))
+            if self.passthrough:
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is not None:
+            data = self.stream.compress(body) if body else b""
+            if not more_body:
+                data += self.stream.finish()
+            await self.downstream(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+            return
+
+        self.buffer.append(body)
+        self.buffered += len(body)
+        if not more_body:
+            await self.send_complete(b"".join(self.buffer))
+        elif self.buffered >= self.middleware.minimum_size:
+            await self.start_stream()
+
+    async def send_complete(self, body: bytes) -> None:
+        """
+        Sends a response whose whole body is known.
+        """
+        if len(body) < self.middleware.minimum_size:
+            await self.downstream(self.start)
+            await self.downstream({"type": "http.response.body", "body": body})
+            return
+        headers = MutableHeaders(scope=self.start)
+        etag = headers.get("etag")
+        if self.scope["method"] == "GET" and etag is not None:
+            # an ETag is only unique within one resource, the body digest is not
+            key = (hashlib.blake2b(body, digest_size=16).digest(), self.codec.name)
+            compressed = self.middleware.cached(key, body, self.codec)
+        else:
+            compressed = self.codec.compress(body)
+        self.encode_etag(headers)
+        headers["Content-Encoding"] = self.codec.name
+        headers["Content-Length"] = str(len(compressed))
+        await self.downstream(self.start)
+        await self.downstream({"type": "http.response.body", "body": compressed})
+
+    async def start_stream(self) -> None:
+        """
+        Switches to incremental compression of a streamed body, sending what
+        was buffered so far.
+        """
+        headers = MutableHeaders(scope=self.start)
+        self.encode_etag(headers)
+        headers["Content-Encoding"] = self.codec.name
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        await self.downstream(self.start)
+        self.stream = self.codec.stream()
+        data = self.stream.compress(b"".join(self.buffer))
+        self.buffer.clear()
+        await self.downstream(
+            {"type": "http.response.body", "body": data, "more_body": True}
+        )
+
+    def encode_etag(self, headers: MutableHeaders) -> None:
+        """
+        Adds the encoding to the ETag of a response about to be compressed.
+        """
+        etag = headers.get("etag")
+        if etag is not None and etag.endswith('"'):
+            headers["ETag"] = encoded_etag(etag, self.codec.name)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    The ETag of the `encoding` representation of a response tagged `etag`.
+    """
+    return f'{etag[:-1]}-{encoding}"'
@@ -0,0 +1,39 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tracing import Tracer
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of every HTTP request.
+    It continues the caller's W3C trace context from the `traceparent`
+    header and returns the request's own `traceparent` in the response.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        with self.tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            headers.get("traceparent"),
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        ) as root:
+
+            async def send_with_context(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    response_headers = MutableHeaders(scope=message)
+                    response_headers["traceparent"] = self.tracer.format_traceparent(
+                        root.trace_id, root.span_id, root.attributes["sampled"]
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_context)
@@ -5,7 +5,14 @@ from pydantic import BaseModel
 class Config(BaseModel):
     """
     Model representing a configuration.
+    `version` is managed by the service: it starts at 1 and is incremented on
+    every write, and is used for optimistic concurrency control (If-Match).
     """
 
     name: str
     metadata: Dict[str, Any]
+    version: int = 1
+
+    class Config:
+        # stored configs are shared by database snapshots and must not change
+        allow_mutation = False
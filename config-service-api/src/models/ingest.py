@@ -0,0 +1,133 @@
+import json
+from typing import Any
+
+from models.config import Config
+
+try:
+    import orjson
+except ImportError:  # optional, bodies are parsed with json otherwise
+    orjson = None
+
+_NOT_STRUCTURE = bytes(sorted(set(range(256)) - set(b'"[]{}')))
+_PARENTHESES = bytes.maketrans(b"[]{}", b"()()")
+# json gives up on deeper documents, orjson does not, and a document this
+# deep could not be written back out with json anyway
+_PARSER_DEPTH = 500
+
+
+class IngestError(ValueError):
+    """
+    Raised when a request body is not a valid config.
+    `status_code` is the HTTP status the body should be rejected with.
+    """
+
+    def __init__(self, message: str, status_code: int = 422) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def nested_deeper(raw: bytes, depth: int) -> bool:
+    """
+    Returns True if objects and arrays are nested more than `depth` levels
+    deep in the valid JSON document `raw`. It works on the raw bytes in a few
+    C-level passes instead of walking the parsed document: strings are
+    dropped, every bracket becomes a parenthesis, and each pass removes the
+    innermost pairs, so whatever is left after `depth` passes is deeper.
+    """
+    if b"\\" in raw:
+        # a run of backslashes is a sequence of escaped backslashes, and any
+        # backslash left escapes the next character, so \" is never a delimiter
+        raw = raw.replace(b"\\\\", b"").replace(b'\\"', b"")
+    structure = raw.translate(_PARENTHESES, _NOT_STRUCTURE)
+    # strings without brackets are left as "", which drop out in one pass
+    brackets = structure.replace(b'""', b"")
+    if b'"' in brackets:
+        # what is left between every other pair of quotes was a string
+        brackets = b"".join(structure.split(b'"')[::2])
+    for _ in range(depth):
+        if not brackets:
+            return False
+        brackets = brackets.replace(b"()", b"")
+    return bool(brackets)
+
+
+def check_limits(raw: bytes, max_bytes: int, max_depth: int) -> None:
+    """
+    Checks the size of the valid JSON document `raw` and how deeply it is nested
+    below its top-level object.
+    Raises IngestError if it is larger than `max_bytes` or nested deeper than
+    `max_depth` levels.
+    """
+    if len(raw) > max_bytes:
+        raise IngestError(f"Config is larger than {max_bytes} bytes", 413)
+    # the config object itself is the one level above metadata
+    if nested_deeper(raw, max_depth + 1):
+        raise IngestError(f"Config is nested deeper than {max_depth} levels")
+
+
+def check_document(document: dict, max_bytes: int, max_depth: int) -> None:
+    """
+    Applies `check_limits` to an already parsed config, such as the result
+    of a patch, measured as it would be sent.
+    """
+    try:
+        raw = json.dumps(document, ensure_ascii=False).encode("utf-8")
+    except RecursionError:
+        raise IngestError(f"Config is nested deeper than {max_depth} levels") from None
+    check_limits(raw, max_bytes, max_depth)
+
+
+def parse_json(raw: bytes, max_bytes: int, max_depth: int) -> Any:
+    """
+    Parses a JSON body within the size and depth limits of a config.
+    The size is checked first, so the parser never sees an oversized body.
+    json gives up on its own on documents nested far deeper than any sensible
+    limit, and the precise depth, capped at what json can parse, is checked
+    once the body is known to be valid JSON. Bodies are parsed with orjson
+    when it is installed.
+    Raises IngestError if the body is too large, not JSON or too deep.
+    """
+    if len(raw) > max_bytes:
+        raise IngestError(f"Config is larger than {max_bytes} bytes", 413)
+    try:
+        data = _loads(raw)
+    except RecursionError:
+        raise IngestError(f"Config is nested deeper than {max_depth} levels") from None
+    except ValueError:
+        raise IngestError("Invalid JSON body", 400) from None
+    check_limits(raw, max_bytes, min(max_depth, _PARSER_DEPTH))
+    return data
+
+
+def _loads(raw: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # json decides whether and how the body is invalid, so both
+            # parsers accept and reject the same bodies
+            pass
+    return json.loads(raw)
+
+
+def parse_config(raw: bytes, max_bytes: int, max_depth: int) -> Config:
+    """
+    Builds a Config straight from a raw JSON body.
+    The body is parsed once within the limits of `parse_json` and only its
+    shape is checked: `name` is a string and `metadata` an object. The
+    parsed metadata is stored as is instead of being copied by model
+    validation. A `version` in the body is ignored, it is managed by the
+    service.
+    Raises IngestError if the body is too large, too deep, not JSON or not
+    a config.
+    """
+    data = parse_json(raw, max_bytes, max_depth)
+    if not isinstance(data, dict):
+        raise IngestError("A config must be a JSON object")
+    name = data.get("name")
+    if not isinstance(name, str):
+        raise IngestError("name must be a string")
+    metadata = data.get("metadata")
+    if not isinstance(metadata, dict):
+        raise IngestError("metadata must be an object")
+    return Config.construct(name=name, metadata=metadata, version=1)
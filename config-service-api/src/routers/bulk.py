@@ -0,0 +1,141 @@
+import json
+from typing import AsyncIterator, List
+
+from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from starlette.responses import JSONResponse, StreamingResponse
+
+from connector.connector import connector_instance as connector
+from connector.snapshot import Snapshot
+from models.config import Config
+from models.ingest import parse_config
+from settings import settings
+
+router = APIRouter()
+
+NDJSON = "application/x-ndjson"
+
+# number of exported records encoded into one chunk of the response body
+EXPORT_CHUNK = 100
+
+
+async def export_lines(snapshot: Snapshot) -> AsyncIterator[bytes]:
+    """
+    Yields the configs of `snapshot` as NDJSON, a chunk of lines at a time, so
+    only one chunk is encoded and held in memory at once.
+    """
+    records = snapshot.records
+    for start in range(0, len(records), EXPORT_CHUNK):
+        yield "".join(
+            json.dumps(dict(config)) + "\n"
+            for config in records[start : start + EXPORT_CHUNK]
+        ).encode("utf-8")
+
+
+@router.get("/export", response_model=None)
+async def export_configs() -> StreamingResponse:
+    """
+    Export all configurations as newline delimited JSON, one config per line.
+    The export is a consistent view of the database at the time of the request,
+    even if it is modified while the response is streamed.
+    Returns:
+        StreamingResponse: The configurations as `application/x-ndjson`.
+    Use like this: curl -X GET "http://{service_host}:{service_port}/api/v1/export"
+        -o configs.ndjson
+    """
+    snapshot = connector.snapshot
+    return StreamingResponse(
+        export_lines(snapshot),
+        media_type=NDJSON,
+        headers={"ETag": f'"{snapshot.revision}"'},
+    )
+
+
+def parse_line(line: bytes) -> Config:
+    """
+    Parses and validates one NDJSON line of an import.
+    Raises ValueError if the line is not a valid config.
+    """
+    return parse_config(line, settings.config_max_bytes, settings.config_max_depth)
+
+
+@router.post("/import", response_model=None)
+async def import_configs(request: Request) -> JSONResponse:
+    """
+    Import configurations from a newline delimited JSON body, one config per line.
+    The body is read incrementally; valid configs are created or replaced in
+    batches of `settings.import_batch_size` with one save of the database per
+    batch. Invalid lines are skipped and reported with their line number; a
+    line longer than `settings.config_max_bytes` is dropped as it streams in
+    instead of being buffered.
+    Args:
+        request (Request): The request with the NDJSON body.
+    Returns:
+        JSONResponse: A summary with the number of created, updated and failed
+        configs, the number of batches applied and the errors.
+    Use like this: curl -X POST "http://{service_host}:{service_port}/api/v1/import"
+        -H  "Content-Type: application/x-ndjson" --data-binary @configs.ndjson
+    """
+    summary = {"created": 0, "updated": 0, "failed": 0, "batches": 0, "errors": []}
+    batch: List[Config] = []
+
+    async def apply_batch() -> None:
+        created, updated = await run_in_threadpool(connector.bulk_upsert, batch)
+        summary["created"] += created
+        summary["updated"] += updated
+        summary["batches"] += 1
+        batch.clear()
+        logger.info(
+            f"Import progress: {summary['created'] + summary['updated']} applied, "
+            f"{summary['failed']} failed"
+        )
+
+    def fail(number: int, error: str) -> None:
+        summary["failed"] += 1
+        if len(summary["errors"]) < settings.import_max_errors:
+            summary["errors"].append({"line": number, "error": error})
+
+    def add_line(number: int, line: bytes) -> None:
+        if not line.strip():
+            return
+        try:
+            batch.append(parse_line(line))
+        except ValueError as e:
+            fail(number, str(e))
+
+    number = 0
+    # the start of the line continued by the next chunk
+    pending = bytearray()
+    # set while skipping the rest of a line that outgrew the size limit
+    skipping = False
+    async for chunk in request.stream():
+        start = 0
+        end = chunk.find(b"\n")
+        while end != -1:
+            number += 1
+            if skipping:
+                skipping = False
+            else:
+                pending += chunk[start:end]
+                add_line(number, bytes(pending))
+            pending.clear()
+            if len(batch) >= settings.import_batch_size:
+                await apply_batch()
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if not skipping:
+            pending += chunk[start:]
+            if len(pending) > settings.config_max_bytes:
+                fail(
+                    number + 1,
+                    f"Config is larger than {settings.config_max_bytes} bytes",
+                )
+                pending.clear()
+                skipping = True
+    if pending:
+        add_line(number + 1, bytes(pending))
+    if batch:
+        await apply_batch()
+
+    return JSONResponse(status_code=200, content=summary)
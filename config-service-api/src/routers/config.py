@@ -1,28 +1,100 @@
 from fastapi import APIRouter, Request, HTTPException
-from starlette.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
 
 from models.config import Config
-from connector.connector import connector_instance as connector
+from models.ingest import IngestError, parse_config, parse_json
+from connector.connector import connector_instance as connector, VersionConflict
+from connector.projection import Projection
+from connector.patch import PatchError
+from settings import settings
+from tracing import tracer
 
 
 router = APIRouter()
 connector.load()
 
 
+def parse_if_match(request: Request) -> frozenset[int] | None:
+    """
+    Returns the config versions listed in the `If-Match` header, or None if the
+    header is absent or `*`. Weak and foreign tags never match.
+    """
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    versions = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            versions.add(int(tag[1:-1]))
+    return frozenset(versions)
+
+
+def ingest(raw: bytes) -> Config:
+    """
+    Builds the config sent in a request body, see `models.ingest.parse_config`.
+    """
+    try:
+        return parse_config(raw, settings.config_max_bytes, settings.config_max_depth)
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e)) from None
+
+
+def version_etag(config: dict) -> str:
+    return f'"{config["version"]}"'
+
+
+def precondition_failed(conflict: VersionConflict) -> HTTPException:
+    return HTTPException(
+        status_code=412,
+        detail=str(conflict),
+        headers={"ETag": f'"{conflict.version}"'},
+    )
+
+
 @router.get("/configs", response_model=None)
-async def list_configs() -> JSONResponse | HTTPException:
+async def list_configs(request: Request, fields: str = None) -> JSONResponse | Response:
     """
     Retrieve a list of all configurations.
+    The response carries an ETag of the database revision; send it back in
+    `If-None-Match` to get a 304 when nothing changed.
+    Args:
+        request (Request): The incoming request.
+        fields (str, optional): Comma separated dotted paths to return, e.g.
+        `name,metadata.key1.key2`. Defaults to the whole config.
     Returns:
-        JSONResponse | HTTPException: The response containing the list of configurations
-        or an exception if not found.
+        JSONResponse | Response: The response containing the list of configurations,
+        or 304 if the client copy is current.
+    Raises:
+        HTTPException: 404 if no configs are found.
     Use like this: curl -X GET "http://{service_host}:{service_port}/api/v1/configs"
     -H  "accept: application/json"
     """
-    configs = connector.list_configs()
+    try:
+        projection = Projection.from_query(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    # the ETag and the body must come from the same snapshot
+    snapshot = connector.snapshot
+    etag = snapshot.revision
+    if projection is not None:
+        # different representations of the same revision need distinct tags
+        etag = f"{etag}-{projection.digest}"
+    etag = f'"{etag}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    configs = connector.list_configs(snapshot)
     if configs:
-        return JSONResponse(status_code=200, content=configs)
-    return HTTPException(status_code=404, detail="No configs found")
+        if projection is not None:
+            configs = projection.apply_all(configs)
+        with tracer.span("encode"):
+            return JSONResponse(
+                status_code=200, content=configs, headers={"ETag": etag}
+            )
+    raise HTTPException(
+        status_code=404, detail="No configs found", headers={"ETag": etag}
+    )
 
 
 @router.post("/configs", response_model=None)
@@ -37,55 +109,87 @@ async def create_config(body: Request) -> JSONResponse | HTTPException:
         -H  "accept: application/json" \
         -H  "Content-Type: application/json" -d "{\"name\":\"string\",\"metadata\":{\"key\":\"string\"}}"
     """
-    config = Config(**await body.json())
-    success, _ = connector.create_config(config)
+    with tracer.span("parse"):
+        config = ingest(await body.body())
+    success, created = await run_in_threadpool(connector.create_config, config)
     if success:
-        return JSONResponse(status_code=201, content={"Created": f"{config.name}"})
-    return HTTPException(status_code=409, detail=f"Unable to update {config.name}")
+        return JSONResponse(
+            status_code=201,
+            content={"Created": f"{config.name}"},
+            headers={"ETag": version_etag(created)},
+        )
+    raise HTTPException(status_code=409, detail=f"Unable to update {config.name}")
 
 
 @router.get("/configs/{name}", response_model=None)
-async def get_config(name: str) -> JSONResponse | HTTPException:
+async def get_config(
+    name: str, request: Request, fields: str = None
+) -> JSONResponse | Response:
     """
     Retrieve a specific configuration by name.
+    The ETag of the response is the config version; use it in `If-Match` to
+    make a later write conditional, or in `If-None-Match` to get a 304.
     Args:
         name (str): The name of the configuration to retrieve.
+        request (Request): The incoming request.
+        fields (str, optional): Comma separated dotted paths to return, e.g.
+        `name,metadata.key1.key2`. Defaults to the whole config.
     Returns:
         JSONResponse | HTTPException: The response containing the configuration data
         or an exception if not found.
     Use like this: curl -X GET "http://{service_host}:{service_port}/api/v1/configs/{name}"
          -H  "accept: application/json"
     """
+    try:
+        projection = Projection.from_query(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
     config = connector.get_config(name)
     if config is not None:
-        return JSONResponse(status_code=200, content=config)
-    return HTTPException(status_code=404, detail=f"Config {name} not found")
+        etag = version_etag(config)
+        if projection is not None:
+            etag = f'"{config["version"]}-{projection.digest}"'
+            config = projection.apply(config)
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers={"ETag": etag})
+        with tracer.span("encode"):
+            return JSONResponse(status_code=200, content=config, headers={"ETag": etag})
+    raise HTTPException(status_code=404, detail=f"Config {name} not found")
 
 
 @router.delete("/configs/{name}", response_model=None)
-async def delete_config(name: str) -> JSONResponse | HTTPException:
+async def delete_config(name: str, request: Request) -> JSONResponse | HTTPException:
     """
     Delete a configuration by name.
+    With an `If-Match` header the delete only happens if the config is still
+    at one of the given versions, otherwise 412 is returned.
     Args:
         name (str): The name of the configuration to delete.
+        request (Request): The incoming request.
     Returns:
         JSONResponse | HTTPException: The response indicating success or failure of the deletion.
     Use like this: curl -X DELETE "http://{service_host}:{service_port}/api/v1/configs/{name}"
         -H  "accept: application/json"
     """
-    response, count = connector.delete_config(name)
+    try:
+        response, count = await run_in_threadpool(
+            connector.delete_config, name, if_match=parse_if_match(request)
+        )
+    except VersionConflict as conflict:
+        raise precondition_failed(conflict) from None
     if response:
         return JSONResponse(
             status_code=200, content={"Deleted": f"{name}", "total": f"{count}"}
         )
-    return HTTPException(status_code=404, detail=f"Config {name} not found")
+    raise HTTPException(status_code=404, detail=f"Config {name} not found")
 
 
 @router.put("/configs/{name}", response_model=None)
-@router.patch("/configs/{name}", response_model=None)
 async def update_config(name: str, body: Request) -> JSONResponse | HTTPException:
     """
     Update a configuration by name.
+    With an `If-Match` header the update only happens if the config is still
+    at one of the given versions, otherwise 412 is returned.
     Args:
         name (str): The name of the configuration to update.
         body (Request): The request body containing the updated configuration data.
@@ -94,8 +198,74 @@ async def update_config(name: str, body: Request) -> JSONResponse | HTTPExceptio
     Use like this: curl -X PUT "http://{service_host}:{service_port}/api/v1/configs/{name}"
         -H  "accept: application/json"
     """
-    config = Config(**await body.json())
-    success, _ = connector.update_config(name, config)
+    with tracer.span("parse"):
+        config = ingest(await body.body())
+    try:
+        success, updated = await run_in_threadpool(
+            connector.update_config, name, config, if_match=parse_if_match(body)
+        )
+    except VersionConflict as conflict:
+        raise precondition_failed(conflict) from None
     if success:
-        return JSONResponse(status_code=200, content={"Updated": f"{config.name}"})
-    return HTTPException(status_code=404, detail=f"Config {name} not found")
+        return JSONResponse(
+            status_code=200,
+            content={"Updated": f"{config.name}"},
+            headers={"ETag": version_etag(updated)},
+        )
+    raise HTTPException(status_code=404, detail=f"Config {name} not found")
+
+
+PATCH_TYPES = {
+    "application/merge-patch+json": "merge",
+    "application/json": "merge",
+    "application/json-patch+json": "json-patch",
+}
+
+
+@router.patch("/configs/{name}", response_model=None)
+async def patch_config(name: str, body: Request) -> JSONResponse | HTTPException:
+    """
+    Partially update a configuration by name.
+    The body is an RFC 7386 JSON Merge Patch (`application/merge-patch+json`,
+    also accepted as `application/json`) or an RFC 6902 JSON Patch
+    (`application/json-patch+json`). With an `If-Match` header the patch is
+    only applied if the config is still at one of the given versions,
+    otherwise 412 is returned. The patch and the patched config are held to
+    the size and depth limits of a created config.
+    Args:
+        name (str): The name of the configuration to patch.
+        body (Request): The request body containing the patch document.
+    Returns:
+        JSONResponse | HTTPException: The response indicating success or failure of the update.
+    Use like this: curl -X PATCH "http://{service_host}:{service_port}/api/v1/configs/{name}"
+        -H  "accept: application/json" \
+        -H  "Content-Type: application/merge-patch+json" -d "{\"metadata\":{\"key\":null}}"
+    """
+    content_type = body.headers.get("content-type", "application/json")
+    kind = PATCH_TYPES.get(content_type.split(";")[0].strip().lower())
+    if kind is None:
+        raise HTTPException(
+            status_code=415, detail=f"Unsupported patch type {content_type}"
+        )
+    raw = await body.body()
+    try:
+        with tracer.span("parse"):
+            patch = parse_json(
+                raw, settings.config_max_bytes, settings.config_max_depth
+            )
+        success, config = await run_in_threadpool(
+            connector.patch_config, name, patch, kind, if_match=parse_if_match(body)
+        )
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e)) from None
+    except PatchError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    except VersionConflict as conflict:
+        raise precondition_failed(conflict) from None
+    if success:
+        return JSONResponse(
+            status_code=200,
+            content={"Updated": f"{config['name']}"},
+            headers={"ETag": version_etag(config)},
+        )
+    raise HTTPException(status_code=404, detail=f"Config {name} not found")
@@ -1,26 +1,94 @@
-from fastapi import APIRouter, HTTPException
-from starlette.responses import JSONResponse
+import hashlib
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
 
 from connector.connector import connector_instance as connector
+from connector.projection import Projection
+from tracing import tracer
 
 router = APIRouter()
 connector.load()
 
 
+def search_etag(revision: str, query: str, projection: Projection | None) -> str:
+    """
+    The ETag of a search response: the database revision, the query and the
+    projection, since the results only change with them.
+    """
+    digest = hashlib.blake2b(query.encode("utf-8"), digest_size=8).hexdigest()
+    etag = f"{revision}-{digest}"
+    if projection is not None:
+        etag = f"{etag}-{projection.digest}"
+    return f'"{etag}"'
+
+
 @router.get("/search/", response_model=None)
-async def search(query: str = None) -> JSONResponse | HTTPException:
+async def search(
+    request: Request, query: str = None, fields: str = None
+) -> JSONResponse | Response:
     """
     Search for configurations based on a query string.
+    The operator is one of `=` (case-insensitive), `==` (exact), or `>`, `>=`,
+    `<`, `<=` (numeric).
+    The response carries an ETag of the database revision and the query; send
+    it back in `If-None-Match` to get a 304 when nothing changed.
     Args:
+        request (Request): The incoming request.
         query (str, optional): The query string to search for configurations{key1.key2.key3..=value}. Defaults to None.
+        fields (str, optional): Comma separated dotted paths to return, e.g.
+        `name,metadata.key1.key2`. Defaults to the whole config.
     Returns:
-        JSONResponse | HTTPException: The response containing the search results or an exception if not found.
+        JSONResponse | Response: The response containing the search results,
+        or 304 if the client copy is current.
+    Raises:
+        HTTPException: 404 if no configs match, 400 if the query is invalid.
     Use like this: curl -X GET "http://{service_host}:{service_port}/search/?query={key1.key2.key3=value}"  \
     -H  "accept: application/json"
     """
+    try:
+        projection = Projection.from_query(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
     if query is not None:
-        configs = connector.search(query)
+        snapshot = connector.snapshot
+        etag = search_etag(snapshot.revision, query, projection)
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers={"ETag": etag})
+        # run off the event loop so identical concurrent queries can coalesce
+        try:
+            configs = await run_in_threadpool(connector.search, query)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from None
+        # the results may come from a newer snapshot if a write landed during
+        # the search, the tag then describes neither
+        headers = {"ETag": etag} if connector.snapshot is snapshot else {}
         if configs:
-            return JSONResponse(status_code=200, content=configs)
-        return HTTPException(status_code=404, detail="No Config Found")
-    return HTTPException(status_code=400, detail="Invalid Query")
+            if projection is not None:
+                configs = projection.apply_all(configs)
+            with tracer.span("encode"):
+                return JSONResponse(status_code=200, content=configs, headers=headers)
+        raise HTTPException(status_code=404, detail="No Config Found", headers=headers)
+    raise HTTPException(status_code=400, detail="Invalid Query")
+
+
+@router.get("/search/explain", response_model=None)
+async def explain(query: str = None) -> JSONResponse | HTTPException:
+    """
+    Describe how a search query would be executed, without running it.
+    Args:
+        query (str, optional): The query string to explain{key1.key2.key3..=value}. Defaults to None.
+    Returns:
+        JSONResponse | HTTPException: The plan: whether an index or a scan is used
+        and why, and how many records would be examined.
+    Use like this: curl -X GET "http://{service_host}:{service_port}/search/explain?query={key1.key2.key3=value}"  \
+    -H  "accept: application/json"
+    """
+    if query is None:
+        raise HTTPException(status_code=400, detail="Invalid Query")
+    try:
+        plan = connector.explain(query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    return JSONResponse(status_code=200, content=plan)
@@ -1,5 +1,8 @@
 import os
 import sys
+import tempfile
+import threading
+import time
 from functools import lru_cache
 
 from loguru import logger
@@ -11,7 +14,7 @@ class Settings:
     Configuration settings for the service.
     """
 
-    def __init__(self) -> None:
+    def __init__(self) -> None:  # pylint: disable=too-many-statements
         self.title: str = "Configuration Service"
         """
         The title of the service.
@@ -56,6 +59,10 @@ class Settings:
                 "name": "search",
                 "description": """Returns configurations that satisfy a given query{key1.key2.key3...=value}""",
             },
+            {
+                "name": "bulk",
+                "description": """Exports and imports all configurations as NDJSON""",
+            },
             {
                 "name": "index",
                 "description": """Root""",
@@ -65,6 +72,189 @@ class Settings:
         Metadata for the API tags.
         """
 
+        self.admission_route_limits: dict[str, int] = {
+            f"{self.prefix}/search": 4,
+            f"{self.prefix}/configs": 16,
+        }
+        """
+        Maximum number of concurrently executing requests per route prefix.
+        """
+
+        self.admission_default_limit: int = 32
+        """
+        Concurrency limit shared by routes not listed in `admission_route_limits`.
+        """
+
+        self.admission_max_queue: int = 64
+        """
+        Maximum number of requests waiting for a slot on a single route.
+        """
+
+        self.admission_target_ms: float = 50.0
+        """
+        Queue latency target. Once queueing delay stays above it for a whole
+        `admission_interval_ms`, waiting requests are shed after this long.
+        """
+
+        self.admission_interval_ms: float = 500.0
+        """
+        Maximum queueing time while the route is healthy, and the window used
+        to decide that it is overloaded.
+        """
+
+        self.admission_priority_paths: list[str] = [
+            "/health",
+            "/ready",
+            "/status",
+            "/metrics",
+        ]
+        """
+        Paths that bypass admission control entirely (probes and scraping).
+        """
+
+        self.search_cache_size: int = 1024
+        """
+        Maximum number of distinct search queries kept in the result cache.
+        """
+
+        self.log_enqueue: bool = True
+        """
+        Flag indicating if log records are handed to a background thread
+        instead of being written synchronously by the caller.
+        """
+
+        self.log_sample_interval: float = 1.0
+        """
+        Minimum number of seconds between two emitted records of the same
+        hot-path message (records bound with a `sample` key).
+        """
+
+        self.journal_limit: int = 1000
+        """
+        Number of patches kept in the journal before it is compacted into a full
+        save of the database file.
+        """
+
+        self.config_max_bytes: int = 1024 * 1024
+        """
+        Maximum size in bytes of a config in a create, update, patch or import.
+        """
+
+        self.config_max_depth: int = 32
+        """
+        Maximum nesting depth of the metadata of a written config.
+        """
+
+        self.import_batch_size: int = 500
+        """
+        Number of imported configs applied and saved to the database at once.
+        """
+
+        self.import_max_errors: int = 100
+        """
+        Maximum number of per-line errors reported back by an import.
+        """
+
+        self.compression_minimum_size: int = 1024
+        """
+        Response bodies smaller than this many bytes are sent uncompressed.
+        """
+
+        self.compression_levels: dict[str, int] = {"gzip": 6, "br": 4, "zstd": 3}
+        """
+        Compression level per content coding. brotli and zstd are only used
+        when their packages are installed.
+        """
+
+        self.compression_cache_size: int = 256
+        """
+        Maximum number of compressed response bodies kept, so each body of a
+        response with an ETag is compressed once instead of on every request.
+        """
+
+        self.shared_cache_max_entries: int = 10000
+        """
+        Maximum number of entries kept by the on-disk shared cache.
+        """
+
+        self.shared_cache_ttl: int = 3600
+        """
+        Seconds after which entries of the Redis shared cache expire.
+        """
+
+    @property
+    def admission_control(self) -> bool:
+        """
+        Flag indicating if admission control (load shedding) is enabled.
+        Returns:
+            bool: The admission control flag.
+        """
+        enabled = os.environ.get("ADMISSION_CONTROL", None)
+        if not enabled:
+            return True
+        return enabled.lower() not in ("0", "false", "no", "off")
+
+    @property
+    def shared_cache(self) -> str:
+        """
+        The second-level cache shared between processes: "none", "disk" or "redis".
+        Returns:
+            str: The shared cache backend name.
+        """
+        return os.environ.get("SHARED_CACHE", "none").lower()
+
+    @property
+    def shared_cache_dir(self) -> str:
+        """
+        The directory used by the on-disk shared cache.
+        Returns:
+            str: The shared cache directory.
+        """
+        return os.environ.get(
+            "SHARED_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "config-service-cache"),
+        )
+
+    @property
+    def redis_url(self) -> str:
+        """
+        The Redis server used when `shared_cache` is "redis".
+        Returns:
+            str: The Redis URL.
+        """
+        return os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+
+    @property
+    def search_indexes(self) -> dict[str, str]:
+        """
+        The secondary search indexes to maintain, as a mapping of dotted path
+        to kind: "exact" (serves `==`), "ci" (case-insensitive, serves `=`) or
+        "range" (numeric, serves `>`, `>=`, `<`, `<=`).
+        Read from SEARCH_INDEXES, e.g. "metadata.env:ci,metadata.port:range".
+        Returns:
+            dict[str, str]: The index kind per path.
+        """
+        indexes = {}
+        for declaration in os.environ.get("SEARCH_INDEXES", "").split(","):
+            if not declaration.strip():
+                continue
+            path, _, kind = declaration.strip().rpartition(":")
+            kind = kind.lower()
+            if (
+                not path
+                or not all(path.split("."))
+                or kind
+                not in (
+                    "exact",
+                    "ci",
+                    "range",
+                )
+            ):
+                logger.warning(f"Ignoring invalid search index '{declaration}'")
+                continue
+            indexes[path] = kind
+        return indexes
+
     @property
     def database_path(self) -> str:
         """
@@ -132,6 +322,68 @@ class Settings:
             return ""
         return sub
 
+    @property
+    def log_level(self) -> str:
+        """
+        The minimum level of emitted log records.
+        Returns:
+            str: The log level.
+        """
+        return os.environ.get("LOG_LEVEL", "INFO").upper()
+
+    @property
+    def log_json(self) -> bool:
+        """
+        Flag indicating if log records are written as structured JSON.
+        Returns:
+            bool: The JSON logging flag.
+        """
+        return os.environ.get("LOG_FORMAT", "").lower() == "json"
+
+    @property
+    def trace_sample_rate(self) -> float:
+        """
+        Probability of recording a trace for a request that does not carry
+        a sampling decision in its `traceparent` header.
+        Returns:
+            float: The trace sample rate.
+        """
+        rate = os.environ.get("TRACE_SAMPLE_RATE", None)
+        if not rate:
+            return 0.05
+        try:
+            return min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            logger.warning("TRACE_SAMPLE_RATE is not a valid number, using 0.05")
+            return 0.05
+
+    @property
+    def trace_exporter(self) -> str:
+        """
+        Where finished traces are sent: "none", "file" or "otlp".
+        Returns:
+            str: The trace exporter name.
+        """
+        return os.environ.get("TRACE_EXPORTER", "none").lower()
+
+    @property
+    def trace_file(self) -> str:
+        """
+        The file traces are appended to when `trace_exporter` is "file".
+        Returns:
+            str: The trace file path.
+        """
+        return os.environ.get("TRACE_FILE", "traces.jsonl")
+
+    @property
+    def otlp_endpoint(self) -> str:
+        """
+        The OTLP/HTTP traces endpoint used when `trace_exporter` is "otlp".
+        Returns:
+            str: The OTLP endpoint.
+        """
+        return os.environ.get("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+
     @property
     def reload(self) -> bool:
         """
@@ -144,4 +396,52 @@ class Settings:
         return False
 
 
+class SampledFilter:
+    """
+    Loguru filter rate-limiting hot-path records.
+    Records bound with a `sample` key (e.g. `logger.bind(sample="search")`)
+    are emitted at most once per `interval` seconds per key and level; the
+    number of records dropped in between is attached as `extra["suppressed"]`.
+    Other records always pass.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._windows: dict[tuple[str, str], tuple[float, int]] = {}
+
+    def __call__(self, record: dict) -> bool:
+        key = record["extra"].get("sample")
+        if key is None:
+            return True
+        key = (key, record["level"].name)
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._windows.get(key, (0.0, 0))
+            if now - last < self.interval:
+                self._windows[key] = (last, suppressed + 1)
+                return False
+            self._windows[key] = (now, 0)
+        record["extra"]["suppressed"] = suppressed
+        return True
+
+
+def configure_logging(config: Settings) -> None:
+    """
+    Replaces the default loguru sink with the service configuration: a
+    queued sink so request handlers never block on log I/O, sampling of
+    hot-path records and optional JSON output.
+    """
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=config.log_level,
+        serialize=config.log_json,
+        enqueue=config.log_enqueue,
+        filter=SampledFilter(config.log_sample_interval),
+        backtrace=config.debug,
+        diagnose=False,
+    )
+
+
 settings = Settings()
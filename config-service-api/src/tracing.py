@@ -0,0 +1,344 @@
+import functools
+import json
+import queue
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List
+
+import httpx
+from loguru import logger
+
+from settings import settings
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass
+class Span:
+    """
+    A timed stage of a request.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+@dataclass
+class _Trace:
+    """
+    Spans of one sampled request, exported together when the root span ends.
+    """
+
+    spans: List[Span] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class SpanExporter(ABC):
+    """
+    Receives the spans of each finished, sampled trace.
+    """
+
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        """
+        Sends the spans of one trace.
+        """
+
+    def shutdown(self) -> None:
+        pass
+
+
+class NoopExporter(SpanExporter):
+    def export(self, spans: List[Span]) -> None:
+        pass
+
+
+@dataclass
+class InMemoryExporter(SpanExporter):
+    """
+    Keeps finished spans in memory, for tests.
+    """
+
+    spans: List[Span] = field(default_factory=list)
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+@dataclass
+class FileExporter(SpanExporter):
+    """
+    Appends finished spans to a file, one JSON object per line.
+    """
+
+    path: str
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict()) + "\n" for span in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+@dataclass
+class OTLPExporter(SpanExporter):
+    """
+    Sends spans to an OpenTelemetry collector using OTLP/HTTP with JSON encoding.
+    Spans are queued and posted in batches from a background thread so that
+    exporting never blocks a request.
+    """
+
+    endpoint: str
+    service_name: str = "config-service"
+    batch_size: int = 512
+    flush_interval: float = 5.0
+    _queue: queue.Queue = field(default_factory=lambda: queue.Queue(maxsize=8192))
+    _thread: threading.Thread | None = None
+
+    def export(self, spans: List[Span]) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="otlp-exporter", daemon=True
+            )
+            self._thread.start()
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                # drop rather than block the request path
+                return
+
+    def shutdown(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        with httpx.Client(timeout=self.flush_interval) as client:
+            stopping = False
+            while not stopping:
+                batch: List[Span] = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        span = self._queue.get(
+                            timeout=max(0.0, deadline - time.monotonic())
+                        )
+                    except queue.Empty:
+                        break
+                    if span is None:
+                        stopping = True
+                        break
+                    batch.append(span)
+                if batch:
+                    try:
+                        client.post(self.endpoint, json=self._encode(batch))
+                    except httpx.HTTPError as e:
+                        logger.warning(f"Failed to export {len(batch)} spans: {e}")
+
+    def _encode(self, spans: List[Span]) -> dict:
+        def attribute(key: str, value: Any) -> dict:
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [attribute("service.name", self.service_name)]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "config-service"},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_id or "",
+                                    "name": span.name,
+                                    "kind": 2 if span.parent_id is None else 1,
+                                    "startTimeUnixNano": str(span.start_ns),
+                                    "endTimeUnixNano": str(span.end_ns),
+                                    "attributes": [
+                                        attribute(k, v)
+                                        for k, v in span.attributes.items()
+                                    ],
+                                    "status": {"code": 2 if span.error else 0},
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_current_trace: ContextVar[_Trace | None] = ContextVar("current_trace", default=None)
+
+
+@dataclass
+class Tracer:
+    """
+    Records spans for sampled requests and hands each finished trace to the exporter.
+    Unsampled requests only carry trace ids for propagation; their stages
+    cost a single context variable lookup.
+    """
+
+    exporter: SpanExporter = field(default_factory=NoopExporter)
+    sample_rate: float = 0.0
+
+    @staticmethod
+    def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+        """
+        Parses a W3C `traceparent` header into (trace id, parent span id, sampled).
+        Returns None if the header is missing or invalid.
+        """
+        if not header:
+            return None
+        match = TRACEPARENT.match(header.strip().lower())
+        if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+            return None
+        return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+    @staticmethod
+    def format_traceparent(trace_id: str, span_id: str, sampled: bool) -> str:
+        return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+    @contextmanager
+    def start_trace(
+        self, name: str, traceparent: str | None = None, **attributes: Any
+    ) -> Iterator[Span]:
+        """
+        Starts the root span of a request, continuing the caller's trace if a
+        valid `traceparent` is given. The caller's sampling decision is honoured,
+        otherwise the request is sampled with probability `sample_rate`.
+        """
+        parent = self.parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+
+        root = Span(name, trace_id, f"{random.getrandbits(64):016x}", parent_id)
+        root.attributes.update(attributes)
+        root.set_attribute("sampled", sampled)
+        trace = _Trace(spans=[root]) if sampled else None
+        span_token = _current_span.set(root)
+        trace_token = _current_trace.set(trace)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = repr(e)
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            if trace is not None:
+                try:
+                    self.exporter.export(trace.spans)
+                except Exception as e:
+                    logger.warning(f"Failed to export trace {trace_id}: {e}")
+
+    @staticmethod
+    @contextmanager
+    def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+        """
+        Records a child span of the current span if the request is sampled,
+        otherwise does nothing and yields None.
+        """
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+        parent = _current_span.get()
+        span = Span(
+            name, parent.trace_id, f"{random.getrandbits(64):016x}", parent.span_id
+        )
+        span.attributes.update(attributes)
+        with trace.lock:
+            trace.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+
+    def traced(self, name: str) -> Callable:
+        """
+        Decorator recording a span around every call of the decorated function.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if _current_trace.get() is None:
+                    return func(*args, **kwargs)
+                with self.span(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+def get_exporter() -> SpanExporter:
+    """
+    Builds the exporter selected by `settings.trace_exporter`.
+    """
+    if settings.trace_exporter == "file":
+        return FileExporter(settings.trace_file)
+    if settings.trace_exporter == "otlp":
+        return OTLPExporter(settings.otlp_endpoint)
+    return NoopExporter()
+
+
+tracer = Tracer(exporter=get_exporter(), sample_rate=settings.trace_sample_rate)
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from middleware.admission import (
+    AdmissionControlMiddleware,
+    AdmissionRejected,
+    RouteLimiter,
+)
+
+
+def make_limiter(**kwargs) -> RouteLimiter:
+    params = {
+        "route": "test",
+        "limit": 1,
+        "max_queue": 1,
+        "target": 0.01,
+        "interval": 0.05,
+    }
+    params.update(kwargs)
+    return RouteLimiter(**params)
+
+
+@pytest.mark.asyncio
+async def test_limiter_hands_slot_to_waiter():
+    """
+    Test that a released slot is handed over to the queued request.
+    """
+    limiter = make_limiter()
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+
+    limiter.release()
+    await waiter
+
+    assert limiter.in_flight == 1
+    assert limiter.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_rejects_when_queue_full():
+    """
+    Test that requests beyond the queue bound are rejected with 429.
+    """
+    limiter = make_limiter()
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await limiter.acquire()
+
+    assert rejected.value.status_code == 429
+    limiter.release()
+    await waiter
+
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_on_queue_timeout():
+    """
+    Test that a request waiting longer than the queue timeout is shed with 503
+    and that sustained delay switches the limiter to the tighter target.
+    """
+    limiter = make_limiter(interval=0.02, target=0.005)
+    await limiter.acquire()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await limiter.acquire()
+    assert rejected.value.status_code == 503
+    assert rejected.value.retry_after >= 1
+
+    with pytest.raises(AdmissionRejected):
+        await limiter.acquire()
+    assert limiter.overloaded is True
+    assert limiter.in_flight == 1
+
+
+def test_middleware_prioritizes_probes():
+    """
+    Test that priority paths bypass admission control while other routes are shed.
+    """
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"is_alive": True}
+
+    @app.get("/work")
+    async def work():
+        return {"done": True}
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        route_limits={"/work": 0},
+        default_limit=1,
+        max_queue=0,
+        target_ms=1,
+        interval_ms=1,
+        priority_paths=["/health"],
+    )
+    client = TestClient(app)
+
+    response = client.get("/work")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+    response = client.get("/health")
+    assert response.status_code == 200
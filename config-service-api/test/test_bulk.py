@@ -0,0 +1,115 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from connector.connector import Connector
+from main import config_service
+from settings import settings
+
+client = TestClient(config_service)
+
+
+@pytest.fixture
+def bulk_connector(tmp_path, mocker):
+    """
+    Fixture serving the bulk routes from a fresh database file.
+    """
+    db_path = tmp_path / "db.json"
+    db_path.write_text(
+        json.dumps([{"name": "Existing", "metadata": {"key": "old"}}]),
+        encoding="utf-8",
+    )
+    connector = Connector(str(db_path))
+    connector.load()
+    mocker.patch("routers.bulk.connector", connector)
+    yield connector
+
+
+def test_export(bulk_connector):  # pylint: disable=redefined-outer-name
+    """
+    Test that the export streams one config per line.
+    """
+    bulk_connector.create_config(
+        bulk_connector.snapshot.get("Existing").copy(update={"name": "Other"})
+    )
+
+    response = client.get(f"{settings.prefix}/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["etag"] == f'"{bulk_connector.revision}"'
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"name": "Existing", "metadata": {"key": "old"}, "version": 1},
+        {"name": "Other", "metadata": {"key": "old"}, "version": 2},
+    ]
+
+
+def test_import_in_batches(
+    bulk_connector, mocker
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that an import is applied in batches with one save per batch,
+    skipping and reporting invalid lines.
+    """
+    mocker.patch.object(settings, "import_batch_size", 2)
+    save = mocker.spy(bulk_connector, "save_database")
+    lines = [
+        json.dumps({"name": "Existing", "metadata": {"key": "new"}}),
+        "{not json",
+        json.dumps({"name": "New1", "metadata": {}}),
+        "",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"name": "New2", "metadata": {"key": "value"}}),
+        json.dumps({"name": "New3"}),
+    ]
+
+    def body():
+        # split mid-line to exercise reassembly of records across chunks
+        data = "\n".join(lines).encode("utf-8")
+        for i in range(0, len(data), 7):
+            yield data[i : i + 7]
+
+    response = client.post(f"{settings.prefix}/import", content=body())
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["created"] == 2
+    assert summary["updated"] == 1
+    assert summary["failed"] == 3
+    assert summary["batches"] == 2
+    assert [error["line"] for error in summary["errors"]] == [2, 5, 7]
+    assert save.call_count == 2
+    assert bulk_connector.get_config("Existing") == {
+        "name": "Existing",
+        "metadata": {"key": "new"},
+        "version": 2,
+    }
+    # versions come from the database-wide sequence, in import order
+    assert bulk_connector.get_config("New1")["version"] == 3
+    assert bulk_connector.get_config("New2")["version"] == 4
+
+
+def test_import_skips_oversized_lines(
+    bulk_connector, mocker
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that a line growing past the size limit is reported and dropped
+    while it streams in, and that the lines after it are imported.
+    """
+    mocker.patch.object(settings, "config_max_bytes", 100)
+
+    def body():
+        yield b'{"name": "Huge", "metadata": {"key": "'
+        for _ in range(50):
+            yield b"x" * 64
+        yield b'"}}\n' + json.dumps({"name": "After", "metadata": {}}).encode()
+        yield b"\n" + b"y" * 200
+
+    response = client.post(f"{settings.prefix}/import", content=body())
+
+    summary = response.json()
+    assert summary["created"] == 1
+    assert summary["failed"] == 2
+    assert [error["line"] for error in summary["errors"]] == [1, 3]
+    assert bulk_connector.get_config("After") is not None
@@ -0,0 +1,111 @@
+import fnmatch
+import json
+
+import pytest
+
+from connector.cache import DiskCache, RedisCache
+from connector.connector import Connector
+from models.config import Config
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the subset of the redis client API the cache uses.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expiry[key] = ex
+
+    def scan_iter(self, match="*"):
+        return [key for key in self.data if fnmatch.fnmatch(key, match)]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """
+    Fixture for a database file shared by several connectors.
+    """
+    path = tmp_path / "db.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"name": "TestConfig1", "metadata": {"key": "value"}},
+                {"name": "TestConfig2", "metadata": {"key": "other"}},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    yield str(path)
+
+
+@pytest.mark.parametrize("backend", ["disk", "redis"])
+def test_search_is_shared_across_connectors(
+    db_path, tmp_path, mocker, backend
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that a search scanned by one process is served to another holding the
+    same revision, and that a write makes the entry unreachable.
+    """
+    if backend == "disk":
+        shared = DiskCache(str(tmp_path / "cache"))
+    else:
+        shared = RedisCache(FakeRedis(), ttl=60)
+    first = Connector(db_path, shared_cache=shared)
+    second = Connector(db_path, shared_cache=shared)
+    first.load()
+    second.load()
+
+    expected = [{"name": "TestConfig1", "metadata": {"key": "value"}, "version": 1}]
+    assert first.search("metadata.key=value") == expected
+    scan = mocker.spy(second, "_search")
+    assert second.search("metadata.key=value") == expected
+    assert scan.call_count == 0
+
+    first.update_config("TestConfig1", Config(name="TestConfig1", metadata={}))
+    second.load()
+    assert second.search("metadata.key=value") == []
+    assert scan.call_count == 1
+
+    shared.clear()
+    assert shared.get(f"search:{second.revision}:metadata.key=value") is None
+
+
+def test_failing_backend_falls_back_to_scan(
+    db_path, mocker
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that an unavailable shared cache does not fail searches.
+    """
+    client = mocker.Mock()
+    client.get.side_effect = ConnectionError("down")
+    client.set.side_effect = ConnectionError("down")
+    connector = Connector(db_path, shared_cache=RedisCache(client))
+    connector.load()
+
+    assert [config["name"] for config in connector.search("metadata.key=other")] == [
+        "TestConfig2"
+    ]
+
+
+def test_disk_cache_prunes_oldest_entries(tmp_path):
+    """
+    Test that the disk cache keeps at most max_entries entries.
+    """
+    cache = DiskCache(str(tmp_path), max_entries=3, prune_every=1)
+
+    for i in range(5):
+        cache.set(f"key{i}", str(i).encode())
+
+    assert len(list(tmp_path.glob("*.entry"))) == 3
@@ -0,0 +1,141 @@
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from client.client import ConfigServiceClient
+from connector.connector import Connector
+from main import config_service
+
+
+@pytest.fixture
+def server_connector(tmp_path, mocker):
+    """
+    Fixture serving the in-process app from a fresh database file.
+    """
+    db_path = tmp_path / "db.json"
+    db_path.write_text(
+        json.dumps(
+            [
+                {"name": "TestConfig1", "metadata": {"key": "value1"}},
+                {"name": "TestConfig2", "metadata": {"key": "value2"}},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    connector = Connector(str(db_path))
+    connector.load()
+    mocker.patch("routers.config.connector", connector)
+    mocker.patch("routers.search.connector", connector)
+    yield connector
+
+
+@pytest.fixture
+def http_client():
+    """
+    Fixture for an HTTP client bound to the ASGI app.
+    """
+    with TestClient(config_service) as client:
+        yield client
+
+
+def test_reads_are_served_from_cache(
+    server_connector, http_client, mocker
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """
+    Test that reads within the staleness bound do not hit the service.
+    """
+    client = ConfigServiceClient(http_client=http_client, refresh_interval=None)
+    spy = mocker.spy(http_client, "get")
+
+    assert client.get("TestConfig1")["metadata"] == {"key": "value1"}
+    assert client.get_many(["TestConfig1", "TestConfig2", "Missing"]) == {
+        "TestConfig1": {
+            "name": "TestConfig1",
+            "metadata": {"key": "value1"},
+            "version": 1,
+        },
+        "TestConfig2": {
+            "name": "TestConfig2",
+            "metadata": {"key": "value2"},
+            "version": 1,
+        },
+        "Missing": None,
+    }
+    assert len(client.list()) == 2
+
+    assert spy.call_count == 1
+
+
+def test_refresh_uses_conditional_requests(
+    server_connector, http_client
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """
+    Test that an unchanged database answers 304 and a write is picked up.
+    """
+    client = ConfigServiceClient(http_client=http_client, refresh_interval=None)
+
+    assert client.refresh() is True
+    assert client.refresh() is False
+
+    client.create("TestConfig3", {"key": "value3"})
+
+    assert client.get("TestConfig3") == {
+        "name": "TestConfig3",
+        "metadata": {"key": "value3"},
+        "version": 2,
+    }
+    assert client.refresh() is False
+
+
+def test_conditional_update(
+    server_connector, http_client
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """
+    Test that updating with a stale version is rejected by the service.
+    """
+    client = ConfigServiceClient(http_client=http_client, refresh_interval=None)
+    version = client.get("TestConfig1")["version"]
+
+    client.update("TestConfig1", {"key": "new"}, version=version)
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        client.update("TestConfig1", {"key": "newer"}, version=version)
+
+    assert error.value.response.status_code == 412
+    assert client.get("TestConfig1")["metadata"] == {"key": "new"}
+
+
+def test_background_refresh(
+    server_connector, http_client
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that the background thread picks up changes made by other writers.
+    """
+    client = ConfigServiceClient(
+        http_client=http_client, refresh_interval=0.01, max_staleness=60
+    )
+    with client:
+        assert client.get("TestConfig1")["metadata"] == {"key": "value1"}
+        server_connector.delete_config("TestConfig1")
+
+        deadline = time.monotonic() + 5
+        while client.get("TestConfig1") is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert client.get("TestConfig1") is None
+
+
+def test_search_and_missing_results(
+    server_connector, http_client
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """
+    Test that search passes through to the service and not found maps to empty.
+    """
+    client = ConfigServiceClient(http_client=http_client, refresh_interval=None)
+
+    assert client.search("metadata.key=value2") == [
+        {"name": "TestConfig2", "metadata": {"key": "value2"}, "version": 1}
+    ]
+    assert client.search("metadata.key=nothing") == []
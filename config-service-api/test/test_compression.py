@@ -0,0 +1,199 @@
+import json
+import zlib
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+
+from connector.connector import Connector
+from main import config_service
+from middleware.compression import (
+    CompressionMiddleware,
+    GzipCompressor,
+    available_codecs,
+    choose_encoding,
+)
+from settings import settings
+
+client = TestClient(config_service)
+
+LARGE = [
+    {"name": f"TestConfig{i}", "metadata": {"key": f"value{i}"}, "version": 1}
+    for i in range(100)
+]
+
+
+def test_choose_encoding():
+    """
+    Test that the codec with the highest q-value wins and q=0 refuses a codec.
+    """
+    codecs = available_codecs({})
+
+    assert choose_encoding("gzip, deflate", codecs).name == "gzip"
+    assert choose_encoding("deflate", codecs) is None
+    assert choose_encoding("gzip;q=0, identity", codecs) is None
+    assert choose_encoding("*;q=0.5", codecs) is not None
+    assert choose_encoding(None, codecs) is None
+
+
+def test_compressed_once_per_version(mocker):
+    """
+    Test that large responses are compressed, small ones are not, and a body is
+    compressed only once per ETag.
+    """
+    mocker.patch("connector.connector.Connector.list_configs", return_value=LARGE)
+    middleware = config_service.middleware_stack
+    while not isinstance(middleware, CompressionMiddleware):
+        middleware = middleware.app
+    middleware.clear_cache()
+    compress = mocker.spy(GzipCompressor, "finish")
+
+    for _ in range(2):
+        response = client.get(
+            f"{settings.prefix}/configs", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json() == LARGE
+    assert compress.call_count == 1
+
+    # the compressed representation has its own tag, which still revalidates
+    etag = response.headers["etag"]
+    assert etag.endswith('-gzip"')
+    response = client.get(
+        f"{settings.prefix}/configs",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = client.get(f"{settings.prefix}/configs", headers={"Accept-Encoding": ""})
+    assert "content-encoding" not in response.headers
+    assert response.json() == LARGE
+
+    mocker.patch("connector.connector.Connector.get_config", return_value=LARGE[0])
+    response = client.get(
+        f"{settings.prefix}/configs/TestConfig0", headers={"Accept-Encoding": "gzip"}
+    )
+    assert "content-encoding" not in response.headers
+
+
+def test_recreated_config_is_not_served_from_cache(
+    tmp_path, mocker
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that a config deleted and created again with other content is never
+    answered with the compressed body of the deleted one.
+    """
+    db_path = tmp_path / "db.json"
+    db_path.write_text("[]", encoding="utf-8")
+    connector = Connector(str(db_path))
+    connector.load()
+    mocker.patch("routers.config.connector", connector)
+    url = f"{settings.prefix}/configs/x"
+
+    def get(encoding: str) -> dict:
+        response = client.get(url, headers={"Accept-Encoding": encoding})
+        assert response.status_code == 200
+        return response.json()
+
+    for content in ("A" * 2000, "B" * 2000):
+        config = {"name": "x", "metadata": {"key": content}}
+        assert client.post(f"{settings.prefix}/configs", json=config).status_code == 201
+        assert get("gzip")["metadata"]["key"] == content
+        assert get("")["metadata"]["key"] == content
+        assert client.delete(url).status_code == 200
+
+
+def test_cache_follows_content_not_etag():
+    """
+    Test that two bodies sent under the same ETag are each compressed.
+    """
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1, cache_size=8, levels={})
+    bodies = iter((b"a" * 100, b"b" * 100))
+
+    @app.get("/tagged")
+    async def tagged():
+        return Response(next(bodies), media_type="text/plain", headers={"ETag": '"1"'})
+
+    with TestClient(app) as test_client:
+        for expected in (b"a" * 100, b"b" * 100):
+            response = test_client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["etag"] == '"1-gzip"'
+            assert response.content == expected
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_is_compressed_incrementally():
+    """
+    Test that a streamed body is compressed chunk by chunk and every chunk
+    can be decoded as soon as it arrives.
+    """
+    lines = [json.dumps(config).encode() + b"\n" for config in LARGE]
+
+    async def app(scope, receive, send):  # pylint: disable=unused-argument
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson")],
+            }
+        )
+        for line in lines:
+            await send({"type": "http.response.body", "body": line, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = CompressionMiddleware(app, minimum_size=200, cache_size=8, levels={})
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/export",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    await middleware(scope, None, send)
+
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decoded = [decoder.decompress(message["body"]) for message in sent[1:]]
+    # buffered up to the threshold, then one compressed chunk per line
+    assert len(decoded) > len(lines) // 2
+    assert all(part.endswith(b"\n") for part in decoded if part)
+    assert b"".join(decoded) == b"".join(lines)
+    assert sent[-1]["more_body"] is False
+
+
+def test_encoded_and_binary_responses_pass_through():
+    """
+    Test that responses already encoded or of incompressible types are untouched.
+    """
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1, cache_size=8, levels={})
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(
+            b"x" * 100, media_type="text/plain", headers={"Content-Encoding": "br"}
+        )
+
+    @app.get("/binary")
+    async def binary():
+        return Response(b"x" * 100, media_type="image/png")
+
+    with TestClient(app) as test_client:
+        response = test_client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "br"
+        response = test_client.get("/binary", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.content == b"x" * 100
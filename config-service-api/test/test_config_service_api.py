@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 from main import config_service
 from settings import settings
+from connector.connector import VersionConflict
 
 import pytest
 
@@ -36,15 +37,24 @@ def test_get_config(mocker):
     """
     mocker.patch(
         "connector.connector.Connector.get_config",
-        return_value={"name": "TestConfig1", "metadata": {"key": "value1"}},
+        return_value={
+            "name": "TestConfig1",
+            "metadata": {"key": "value1"},
+            "version": 1,
+        },
     )
 
     response = client.get(f"{settings.prefix}/configs/TestConfig1")
 
     assert response.status_code == 200
 
-    expected_data = {"name": "TestConfig1", "metadata": {"key": "value1"}}
+    expected_data = {
+        "name": "TestConfig1",
+        "metadata": {"key": "value1"},
+        "version": 1,
+    }
     assert response.json() == expected_data
+    assert response.headers["ETag"] == '"1"'
 
 
 def test_create_config(mocker):
@@ -53,7 +63,10 @@ def test_create_config(mocker):
     """
     mocker.patch(
         "connector.connector.Connector.create_config",
-        return_value=(True, {"name": "TestConfig1", "metadata": {"key": "value1"}}),
+        return_value=(
+            True,
+            {"name": "TestConfig1", "metadata": {"key": "value1"}, "version": 1},
+        ),
     )
 
     response = client.post(
@@ -74,7 +87,10 @@ def test_update_config(mocker):
     """
     mocker.patch(
         "connector.connector.Connector.update_config",
-        return_value=(True, {"name": "TestConfig1", "metadata": {"key": "value1"}}),
+        return_value=(
+            True,
+            {"name": "TestConfig1", "metadata": {"key": "value1"}, "version": 1},
+        ),
     )
 
     response = client.put(
@@ -88,9 +104,22 @@ def test_update_config(mocker):
 
     assert response.json() == expected_data
 
+
+def test_patch_config(mocker):
+    """
+    Test for the /configs/{name} endpoint to partially update a configuration.
+    """
+    patch_config = mocker.patch(
+        "connector.connector.Connector.patch_config",
+        return_value=(
+            True,
+            {"name": "TestConfig1", "metadata": {"key": "value1"}, "version": 1},
+        ),
+    )
+
     response = client.patch(
         f"{settings.prefix}/configs/TestConfig1",
-        json={"name": "TestConfig1", "metadata": {"key": "value1"}},
+        json={"metadata": {"key": "value1"}},
     )
 
     assert response.status_code == 200
@@ -98,6 +127,26 @@ def test_update_config(mocker):
     expected_data = {"Updated": "TestConfig1"}
 
     assert response.json() == expected_data
+    patch_config.assert_called_with(
+        "TestConfig1", {"metadata": {"key": "value1"}}, "merge", if_match=None
+    )
+
+    response = client.patch(
+        f"{settings.prefix}/configs/TestConfig1",
+        content='[{"op": "replace", "path": "/metadata/key", "value": "value1"}]',
+        headers={"Content-Type": "application/json-patch+json"},
+    )
+
+    assert response.status_code == 200
+    assert patch_config.call_args.args[2] == "json-patch"
+
+    response = client.patch(
+        f"{settings.prefix}/configs/TestConfig1",
+        content="key=value1",
+        headers={"Content-Type": "text/plain"},
+    )
+
+    assert response.status_code == 415
 
 
 def test_delete_config(mocker):
@@ -139,6 +188,84 @@ def test_search(mocker):
         {"name": "TestConfig2", "metadata": {"key1": "value1", "key2": "value2"}},
     ]
 
+    # the results are tagged with the revision and the query
+    etag = response.headers["etag"]
+    response = client.get(
+        f"{settings.prefix}/search?query=metadata.key1.key2=value2",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    response = client.get(
+        f"{settings.prefix}/search?query=metadata.key1.key2=other",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_field_projection(mocker):
+    """
+    Test that the fields parameter projects config and search responses.
+    """
+    config = {
+        "name": "TestConfig1",
+        "metadata": {"key1": {"key2": "value2", "key3": "value3"}, "other": 1},
+        "version": 1,
+    }
+    mocker.patch("connector.connector.Connector.get_config", return_value=config)
+    mocker.patch("connector.connector.Connector.search", return_value=[config])
+
+    response = client.get(
+        f"{settings.prefix}/configs/TestConfig1?fields=name,metadata.key1.key2"
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "name": "TestConfig1",
+        "metadata": {"key1": {"key2": "value2"}},
+    }
+
+    response = client.get(
+        f"{settings.prefix}/search/?query=metadata.other=1"
+        "&fields=metadata.key1,metadata.key1.key3,metadata.missing.key"
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"metadata": {"key1": {"key2": "value2", "key3": "value3"}}}
+    ]
+
+    response = client.get(f"{settings.prefix}/configs/TestConfig1?fields=metadata..key")
+    assert response.status_code == 400
+
+
+def test_conditional_writes(mocker):
+    """
+    Test that If-Match is passed to the connector and a stale version gives 412.
+    """
+    update_config = mocker.patch(
+        "connector.connector.Connector.update_config",
+        side_effect=VersionConflict("TestConfig1", 3),
+    )
+
+    response = client.put(
+        f"{settings.prefix}/configs/TestConfig1",
+        json={"name": "TestConfig1", "metadata": {"key": "value1"}},
+        headers={"If-Match": '"2", W/"3"'},
+    )
+
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"3"'
+    assert update_config.call_args.kwargs["if_match"] == frozenset({2})
+
+    delete_config = mocker.patch(
+        "connector.connector.Connector.delete_config", return_value=(True, 1)
+    )
+    response = client.delete(
+        f"{settings.prefix}/configs/TestConfig1", headers={"If-Match": "*"}
+    )
+
+    assert response.status_code == 200
+    assert delete_config.call_args.kwargs["if_match"] is None
+
 
 if __name__ == "__main__":
     pytest.main()
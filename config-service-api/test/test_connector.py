@@ -1,9 +1,12 @@
 import json
 import os
+import threading
+import time
 import pytest
 from typing import List
 from models.config import Config
-from connector.connector import Connector
+from connector.connector import Connector, VersionConflict
+from connector.patch import PatchError
 from settings import settings
 
 
@@ -11,16 +14,26 @@ from settings import settings
 def prepare_test_db():
     """
     Fixture to prepare the test_db.json file by clearing its contents.
-    This fixture runs once at the beginning of the test session.
+    This fixture runs once at the beginning of the test session, and removes
+    the files the connector keeps next to the database at the end.
     """
     db_path = settings.database_path
+    sidecars = (f"{db_path}.sequence", f"{db_path}.journal")
+
+    def remove_sidecars():
+        for path in sidecars:
+            if os.path.exists(path):
+                os.remove(path)
 
     if os.path.exists(db_path):
         with open(db_path, "w", encoding="utf-8") as f:
             json.dump([], f)
+    remove_sidecars()
 
     yield
 
+    remove_sidecars()
+
 
 @pytest.fixture
 def test_connector():  # pylint: disable=redefined-outer-name
@@ -115,6 +128,202 @@ def test_update_config_not_found(
     assert updated_config is None
 
 
+def test_patch_config(tmp_path):
+    """
+    Test for the patch_config method of Connector class, including that the
+    change is journaled as a delta and survives a reload.
+    """
+    db_path = tmp_path / "db.json"
+    db_path.write_text(
+        json.dumps(
+            [{"name": "Patched", "metadata": {"a": {"b": 1, "c": 2}, "d": [1, 2]}}]
+        ),
+        encoding="utf-8",
+    )
+    connector = Connector(str(db_path))
+    connector.load()
+
+    success, patched = connector.patch_config(
+        "Patched", {"metadata": {"a": {"b": None, "e": 3}}}
+    )
+    assert success is True
+    assert patched["metadata"] == {"a": {"c": 2, "e": 3}, "d": [1, 2]}
+
+    success, patched = connector.patch_config(
+        "Patched",
+        [
+            {"op": "test", "path": "/metadata/a/c", "value": 2},
+            {"op": "add", "path": "/metadata/d/-", "value": 3},
+            {"op": "move", "from": "/metadata/a/e", "path": "/metadata/f"},
+        ],
+        kind="json-patch",
+    )
+    assert success is True
+    assert patched["metadata"] == {"a": {"c": 2}, "d": [1, 2, 3], "f": 3}
+
+    # the base file is untouched, the changes live in the journal
+    assert json.loads(db_path.read_text(encoding="utf-8"))[0]["metadata"]["a"] == {
+        "b": 1,
+        "c": 2,
+    }
+    with open(connector.journal_path, encoding="utf-8") as journal:
+        assert len(journal.readlines()) == 2
+
+    reloaded = Connector(str(db_path))
+    reloaded.load()
+    assert reloaded.get_config("Patched") == patched
+
+    # a journal left behind by a full save is not replayed over newer data
+    journal_path = tmp_path / "db.json.journal"
+    journal = journal_path.read_text(encoding="utf-8")
+    reloaded.save_database()
+    assert not os.path.exists(reloaded.journal_path)
+    journal_path.write_text(journal, encoding="utf-8")
+    reloaded.update_config("Patched", Config(name="Patched", metadata={}))
+    journal_path.write_text(journal, encoding="utf-8")
+    reloaded.load()
+    assert reloaded.get_config("Patched") == {
+        "name": "Patched",
+        "metadata": {},
+        "version": 4,
+    }
+    connector.load()
+
+    with pytest.raises(PatchError):
+        connector.patch_config("Patched", {"name": "Renamed"})
+    with pytest.raises(PatchError):
+        connector.patch_config(
+            "Patched", [{"op": "replace", "path": "/name", "value": "X"}], "json-patch"
+        )
+
+    with pytest.raises(PatchError):
+        connector.patch_config(
+            "Patched", [{"op": "test", "path": "/metadata/f", "value": 4}], "json-patch"
+        )
+    with pytest.raises(PatchError):
+        connector.patch_config("Patched", {"metadata": None})
+    assert connector.patch_config("Missing", {"metadata": {}}) == (False, None)
+
+
+def test_patch_config_invalidates_affected_searches(
+    tmp_path,
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that a patch only drops cached searches it can affect.
+    """
+    db_path = tmp_path / "db.json"
+    db_path.write_text(
+        json.dumps(
+            [
+                {"name": "One", "metadata": {"env": "prod", "team": "a"}},
+                {"name": "Two", "metadata": {"env": "dev", "team": "b"}},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    connector = Connector(str(db_path))
+    connector.load()
+    connector.search("metadata.env=prod")
+    connector.search("metadata.team=b")
+    connector.search("metadata.team=a")
+
+    connector.patch_config("One", {"metadata": {"env": "dev"}})
+
+    cached = connector._search_cache  # pylint: disable=protected-access
+    assert "metadata.team=b" in cached
+    assert "metadata.env=prod" not in cached
+    assert "metadata.team=a" not in cached
+    assert connector.search("metadata.env=dev") == [
+        {"name": "One", "metadata": {"env": "dev", "team": "a"}, "version": 2},
+        {"name": "Two", "metadata": {"env": "dev", "team": "b"}, "version": 1},
+    ]
+
+
+def test_optimistic_concurrency(tmp_path):
+    """
+    Test that writes bump the version and stale conditional writes are rejected.
+    """
+    db_path = tmp_path / "db.json"
+    db_path.write_text("[]", encoding="utf-8")
+    connector = Connector(str(db_path))
+    connector.load()
+
+    _, created = connector.create_config(
+        Config(name="Versioned", metadata={"key": "value"}, version=7)
+    )
+    assert created["version"] == 1
+
+    _, updated = connector.update_config(
+        "Versioned", Config(name="Versioned", metadata={"key": "new"}), if_match={1}
+    )
+    assert updated["version"] == 2
+
+    with pytest.raises(VersionConflict) as conflict:
+        connector.update_config(
+            "Versioned", Config(name="Versioned", metadata={}), if_match={1}
+        )
+    assert conflict.value.version == 2
+
+    _, patched = connector.patch_config(
+        "Versioned", {"metadata": {"other": 1}}, if_match={2}
+    )
+    assert patched["version"] == 3
+    with pytest.raises(PatchError):
+        connector.patch_config("Versioned", {"version": 10})
+
+    with pytest.raises(VersionConflict):
+        connector.delete_config("Versioned", if_match={2})
+
+    reloaded = Connector(str(db_path))
+    reloaded.load()
+    assert reloaded.get_config("Versioned")["version"] == 3
+    assert reloaded.delete_config("Versioned", if_match={3}) == (True, 1)
+
+    # versions are never reused, even for a config deleted and created again
+    # after a restart
+    reloaded = Connector(str(db_path))
+    reloaded.load()
+    _, created = reloaded.create_config(Config(name="Versioned", metadata={}))
+    assert created["version"] == 4
+    with pytest.raises(VersionConflict):
+        reloaded.update_config(
+            "Versioned", Config(name="Versioned", metadata={}), if_match={1}
+        )
+
+
+def test_snapshots_are_immutable(tmp_path):
+    """
+    Test that a snapshot taken before a write is unaffected by it, and that
+    deleting duplicated names removes every copy.
+    """
+    db_path = tmp_path / "db.json"
+    db_path.write_text(
+        json.dumps(
+            [
+                {"name": "Dup", "metadata": {"n": 1}},
+                {"name": "Dup", "metadata": {"n": 2}},
+                {"name": "Other", "metadata": {"n": 3}},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    connector = Connector(str(db_path))
+    connector.load()
+    before = connector.snapshot
+
+    connector.patch_config("Other", {"metadata": {"n": 4}})
+    assert connector.delete_config("Dup") == (True, 2)
+
+    assert [config.name for config in before.records] == ["Dup", "Dup", "Other"]
+    assert before.get("Other").metadata == {"n": 3}
+    assert connector.snapshot.generation > before.generation
+    assert connector.list_configs() == [
+        {"name": "Other", "metadata": {"n": 4}, "version": 2}
+    ]
+    with pytest.raises(TypeError):
+        before.get("Other").metadata = {}
+
+
 def test_delete_config(test_connector):  # pylint: disable=redefined-outer-name
     """
     Test for the delete_config method of Connector class.
@@ -158,6 +367,49 @@ def test_search_config(test_connector):  # pylint: disable=redefined-outer-name
         assert isinstance(config, dict)
 
 
+def test_search_coalesces_concurrent_queries(
+    test_connector, mocker
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that identical concurrent searches share a single scan and that the
+    result is cached until the next write.
+    """
+    test_connector.load()
+    release = threading.Event()
+
+    def slow_search(query, snapshot):  # pylint: disable=unused-argument
+        release.wait(timeout=5)
+        return [{"name": "TestConfig2", "metadata": {"key": "value"}}]
+
+    scan = mocker.patch.object(test_connector, "_search", side_effect=slow_search)
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(test_connector.search("metadata.key=value"))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    while test_connector._flight.in_flight() == 0:  # pylint: disable=protected-access
+        time.sleep(0.001)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert scan.call_count == 1
+    assert len(results) == 8
+    assert all(result is results[0] for result in results)
+
+    test_connector.search("metadata.key=value")
+    assert scan.call_count == 1
+
+    test_connector.clear_cache()
+    test_connector.search("metadata.key=value")
+    assert scan.call_count == 2
+
+
 def test_search_config_not_found(
     test_connector,
 ):  # pylint: disable=redefined-outer-name
@@ -170,3 +422,6 @@ def test_search_config_not_found(
 
     assert isinstance(results, List)
     assert len(results) == 0
+
+    with pytest.raises(ValueError):
+        test_connector.search("metadata.key")
@@ -0,0 +1,149 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from connector.connector import Connector
+from connector.index import build_indexes
+from connector.query import parse_query
+from main import config_service
+from models.config import Config
+from monitoring import NAMESPACE, SUBSYSTEM
+from settings import settings
+
+client = TestClient(config_service)
+
+SPECS = {"metadata.env": "ci", "metadata.owner": "exact", "metadata.port": "range"}
+
+QUERIES = [
+    "metadata.env=PROD",
+    "metadata.env=staging",
+    "metadata.owner==Team-A",
+    "metadata.owner==team-a",
+    "metadata.port>8080",
+    "metadata.port>=8080",
+    "metadata.port<8082",
+    "metadata.port<=8080.0",
+    "metadata.env==prod",
+    "name=config-3",
+]
+
+
+def metric(name: str) -> str:
+    return "_".join(part for part in (NAMESPACE, SUBSYSTEM, name) if part)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """
+    Fixture for a database file with values of mixed types and case.
+    """
+    path = tmp_path / "db.json"
+    records = [
+        {
+            "name": f"config-{i}",
+            "metadata": {
+                "env": ["prod", "Prod", "staging"][i % 3],
+                "owner": ["Team-A", "team-a", "team-b"][i % 3],
+                "port": [8080, "8081", 8082.5, "n/a", True][i % 5],
+            },
+        }
+        for i in range(30)
+    ]
+    records.append({"name": "bare", "metadata": {}})
+    path.write_text(json.dumps(records), encoding="utf-8")
+    yield str(path)
+
+
+def results(connector, query):
+    return [config["name"] for config in connector.search(query)]
+
+
+def test_parse_query():
+    """
+    Test that operators are recognised and range operators need a number.
+    """
+    assert parse_query("a.b==x=y").operator == "=="
+    assert parse_query("a.b>=1").path == ("a", "b")
+    assert parse_query("a.b=x>1").value == "x>1"
+    with pytest.raises(ValueError):
+        parse_query("a.b>one")
+    with pytest.raises(ValueError):
+        parse_query("a..b=1")
+
+
+def test_index_results_match_scan(db_path):  # pylint: disable=redefined-outer-name
+    """
+    Test that indexed searches return what a scan returns, before and after
+    writes that update the indexes incrementally.
+    """
+    indexed = Connector(db_path, index_specs=SPECS)
+    indexed.load()
+    scanned = Connector(db_path)
+    scanned.load()
+
+    def check():
+        scanned.load()
+        for query in QUERIES:
+            assert results(indexed, query) == results(scanned, query), query
+        assert dict(indexed.snapshot.indexes) == dict(
+            build_indexes(SPECS, indexed.snapshot.records)
+        )
+        # the revision derived write by write matches one computed afresh
+        assert indexed.snapshot.revision == scanned.snapshot.revision
+
+    check()
+    indexed.patch_config("config-1", {"metadata": {"port": 9000, "env": "PROD"}})
+    check()
+    indexed.update_config("config-2", Config(name="config-2", metadata={}))
+    check()
+    indexed.create_config(
+        Config(name="new", metadata={"env": "prod", "owner": "Team-A", "port": 1})
+    )
+    check()
+    indexed.delete_config("config-0")
+    check()
+
+
+def test_explain_and_metrics(db_path, mocker):  # pylint: disable=redefined-outer-name
+    """
+    Test that explain reports the plan and searches record strategy metrics.
+    """
+    connector = Connector(db_path, index_specs=SPECS)
+    connector.load()
+    mocker.patch("routers.search.connector", connector)
+
+    response = client.get(f"{settings.prefix}/search/explain?query=metadata.port>8081")
+    assert response.status_code == 200
+    plan = response.json()
+    assert plan["strategy"] == "index"
+    assert plan["index"] == {
+        "path": "metadata.port",
+        "kind": "range",
+        "operators": ["<", "<=", ">", ">="],
+    }
+    assert plan["records_examined"] == 6
+    assert plan["records_total"] == 31
+
+    plan = client.get(
+        f"{settings.prefix}/search/explain?query=metadata.env==prod"
+    ).json()
+    assert plan["strategy"] == "scan"
+    assert plan["reason"] == "ci index does not serve '=='"
+
+    response = client.get(f"{settings.prefix}/search/explain?query=metadata.port>x")
+    assert response.status_code == 400
+
+    labels = {"strategy": "index", "path": "metadata.port"}
+    before = REGISTRY.get_sample_value(metric("search_plans_total"), labels) or 0
+    connector.search("metadata.port>8081")
+    assert REGISTRY.get_sample_value(metric("search_plans_total"), labels) == (
+        before + 1
+    )
+
+    mocker.patch("connector.connector.connector_instance", connector)
+    memory = REGISTRY.get_sample_value(
+        metric("search_index_memory_bytes"), {"path": "metadata.env", "kind": "ci"}
+    )
+    assert memory > 0
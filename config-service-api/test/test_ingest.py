@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from connector.connector import Connector
+from main import config_service
+from models.ingest import IngestError, parse_config
+from settings import settings
+
+client = TestClient(config_service)
+
+
+def test_parse_config():
+    """
+    Test that a valid body becomes a Config holding the parsed metadata as is.
+    """
+    raw = json.dumps(
+        {"name": "Big", "metadata": {"a": [{"b": 1}], "c": None}, "version": 9}
+    ).encode()
+
+    config = parse_config(raw, max_bytes=1024, max_depth=3)
+
+    assert dict(config) == {
+        "name": "Big",
+        "metadata": {"a": [{"b": 1}], "c": None},
+        "version": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    "body,status_code",
+    [
+        (b"{not json", 400),
+        (b"[]", 422),
+        (b'{"name": 1, "metadata": {}}', 422),
+        (b'{"name": "n", "metadata": []}', 422),
+        (b'{"name": "n"}', 422),
+        (b'{"name": "n", "metadata": {"a": {"b": {"c": {}}}}}', 422),
+        (b'{"name": "n", "metadata": {"a": [[[1]]]}}', 422),
+        (b'{"name": "n", "metadata": {"pad": "' + b"x" * 2000 + b'"}}', 413),
+    ],
+)
+def test_parse_config_rejects(body, status_code):
+    """
+    Test that malformed, misshapen, too deep and too large bodies are rejected.
+    """
+    with pytest.raises(IngestError) as error:
+        parse_config(body, max_bytes=1024, max_depth=3)
+
+    assert error.value.status_code == status_code
+
+
+def test_write_routes_reject_invalid_bodies(mocker):
+    """
+    Test that create and update answer invalid bodies with a client error
+    without reaching the connector.
+    """
+    create_config = mocker.patch("connector.connector.Connector.create_config")
+    mocker.patch.object(settings, "config_max_depth", 2)
+
+    response = client.post(
+        f"{settings.prefix}/configs",
+        content=b'{"name": "n", "metadata": {"a": {"b": {}}}}',
+    )
+    assert response.status_code == 422
+
+    response = client.put(f"{settings.prefix}/configs/n", content=b"{")
+    assert response.status_code == 400
+    assert create_config.call_count == 0
+
+
+def test_deeply_nested_bodies_are_rejected(tmp_path, mocker):
+    """
+    Test that a body too deep for the JSON parser is rejected before parsing,
+    on every write route, and that an import keeps going past it.
+    """
+    deep = b'{"name": "n", "metadata": {"a": ' + b"[" * 100000 + b"]" * 100000 + b"}}"
+    with pytest.raises(IngestError) as error:
+        parse_config(deep, max_bytes=len(deep), max_depth=10**6)
+    assert error.value.status_code == 422
+
+    db_path = tmp_path / "db.json"
+    db_path.write_text('[{"name": "n", "metadata": {}}]', encoding="utf-8")
+    connector = Connector(str(db_path), config_max_bytes=100, config_max_depth=3)
+    connector.load()
+    mocker.patch("routers.config.connector", connector)
+    mocker.patch("routers.bulk.connector", connector)
+
+    response = client.post(f"{settings.prefix}/configs", content=deep)
+    assert response.status_code == 422
+    response = client.post(
+        f"{settings.prefix}/import", content=deep + b'\n{"name": "m", "metadata": {}}'
+    )
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+    assert response.json()["errors"][0]["line"] == 1
+
+    url = f"{settings.prefix}/configs/n"
+    response = client.patch(url, content=b'{"metadata": {"a": ' + deep + b"}}")
+    assert response.status_code == 422
+    # each patch is small, but the config may not grow past the limits
+    for key in ("a", "b"):
+        response = client.patch(url, json={"metadata": {key: "x" * 40}})
+    assert response.status_code == 413
+    response = client.patch(url, json={"metadata": {"a": [[[[1]]]]}})
+    assert response.status_code == 422
+    assert connector.get_config("n")["metadata"] == {"a": "x" * 40}
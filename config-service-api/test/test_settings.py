@@ -0,0 +1,28 @@
+from loguru import logger
+
+from settings import SampledFilter
+
+
+def test_sampled_filter_rate_limits_hot_path_records():
+    """
+    Test that records bound with a sample key are rate-limited per key and
+    report how many were suppressed, while other records always pass.
+    """
+    records = []
+    handler = logger.add(
+        records.append, level="DEBUG", filter=SampledFilter(interval=60)
+    )
+    try:
+        hot = logger.bind(sample="search")
+        for i in range(5):
+            hot.info("Found {} configs", i)
+            logger.info("Created config {}", i)
+        logger.bind(sample="other").info("Other")
+    finally:
+        logger.remove(handler)
+
+    messages = [record.record["message"] for record in records]
+    assert messages.count("Found 0 configs") == 1
+    assert not any(message.startswith("Found 1") for message in messages)
+    assert len([m for m in messages if m.startswith("Created")]) == 5
+    assert "Other" in messages
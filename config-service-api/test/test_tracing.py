@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import config_service
+from settings import settings
+from tracing import FileExporter, InMemoryExporter, Tracer, tracer
+
+client = TestClient(config_service)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture
+def exporter(mocker):
+    """
+    Fixture recording every request's spans in memory.
+    """
+    memory = InMemoryExporter()
+    mocker.patch.object(tracer, "exporter", memory)
+    mocker.patch.object(tracer, "sample_rate", 1.0)
+    yield memory
+
+
+def test_request_spans_and_propagation(
+    exporter, mocker
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that a request records a root span plus connector and encode spans,
+    continuing the trace given in the traceparent header.
+    """
+    mocker.patch(
+        "connector.connector.Connector._search",
+        return_value=[{"name": "TestConfig1", "metadata": {"key": "value"}}],
+    )
+
+    response = client.get(
+        f"{settings.prefix}/search/?query=metadata.key=traced",
+        headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["traceparent"].startswith(f"00-{TRACE_ID}-")
+    assert response.headers["traceparent"].endswith("-01")
+
+    spans = {span.name: span for span in exporter.spans}
+    root = spans[f"GET {settings.prefix}/search/"]
+    assert root.parent_id == "00f067aa0ba902b7"
+    assert root.attributes["http.status_code"] == 200
+    assert spans["connector.search"].parent_id == root.span_id
+    assert spans["encode"].parent_id == root.span_id
+    assert all(span.trace_id == TRACE_ID for span in exporter.spans)
+    assert all(span.end_ns is not None for span in exporter.spans)
+
+
+def test_unsampled_requests_are_not_exported(
+    exporter,
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that a caller's "not sampled" decision is honoured but still propagated.
+    """
+    response = client.get(
+        "/health", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-00"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["traceparent"].endswith("-00")
+    assert not exporter.spans
+
+
+def test_file_exporter(tmp_path):
+    """
+    Test that the file exporter writes one JSON line per span.
+    """
+    path = tmp_path / "traces.jsonl"
+    file_tracer = Tracer(exporter=FileExporter(str(path)), sample_rate=1.0)
+
+    with file_tracer.start_trace("root"):
+        with file_tracer.span("child", key="value"):
+            pass
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["root", "child"]
+    assert lines[1]["parent_id"] == lines[0]["span_id"]
+    assert lines[1]["attributes"] == {"key": "value"}